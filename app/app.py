@@ -1,15 +1,30 @@
-from flask import Flask, request, redirect, url_for, render_template, jsonify
-from flask_mysqldb import MySQL
-from misterscrapper import get_player_list, get_all_jornada_points
+from flask import Flask, Response, request, redirect, url_for, render_template, jsonify, make_response
+from markupsafe import Markup
 from dotenv import load_dotenv
-from db.mister.misterdb import upsert_points, upsert_player, get_jornada, get_rounds, get_debts, calcular_y_actualizar_deudas
+from misterjobs import JobManager
+from misterscheduler import RefreshScheduler, SCHEDULER_ENABLED, REFRESH_MIN_INTERVAL
+from misterleagues import LeagueWorkers, refresh_points, refresh_players, LEAGUE_WORKERS
+from db.mister.misterpool import MySQLPool
+from db.mister.migrate import migrate_on_startup, run_script, check_read_indexes, TRUNCATE_SCRIPT
+from mistercache import ResponseCache, CachedResponse
+from mistersnapshots import SnapshotPublisher
+from misterdriver import chrome_rss
+import mistermetrics
+import misterassets
+import misterimages
+from db.mister.misterdb import get_leagues, add_league, set_name_mapping, get_jornada, get_rounds, get_debts, get_debts_json, get_dashboard, calcular_y_actualizar_deudas
+from functools import partial
 import os
+import json
 import logging
+import threading
+import time
+import click
 
 app = Flask(__name__)
 
 # Configuración del registro
-logging.basicConfig(level=logging.DEBUG)
+logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO').upper())
 
 # Cargar variables de entorno desde el archivo .env
 load_dotenv()
@@ -20,8 +35,44 @@ app.config['MYSQL_USER'] = os.getenv('MYSQL_USER')
 app.config['MYSQL_PASSWORD'] = os.getenv('MYSQL_PASSWORD')
 app.config['MYSQL_DB'] = os.getenv('MYSQL_DATABASE')
 
-# Inicializar la conexión a MySQL
-db = MySQL(app)
+# Inicializar el pool de conexiones a MySQL
+db = MySQLPool(app)
+
+# Crear o actualizar el esquema de la base de datos
+if os.getenv('MIGRATE_ON_STARTUP', '1') == '1':
+    migrate_on_startup(db)
+
+# Trabajos de actualización en segundo plano, como mucho uno por proceso de liga
+jobs = JobManager(app, workers=max(1, LEAGUE_WORKERS))
+
+# Caché de las lecturas de la API, invalidada en cada actualización de datos
+cache = ResponseCache()
+
+# Lecturas de la API publicadas como ficheros que sirve nginx
+snapshots = SnapshotPublisher()
+
+# Ligas con datos nuevos desde la última publicación de sus snapshots
+stale_snapshots = set()
+
+def data_changed(league):
+    """Los datos de la liga han cambiado: se invalida la caché y sus snapshots se
+    vuelven a publicar al terminar el trabajo. Mientras tanto nginx sigue sirviendo
+    la versión anterior; el panel que la web pide con ?live=1 tras cada jornada
+    guardada lo responde Flask con los datos nuevos."""
+    cache.invalidate()
+    stale_snapshots.add(league['slug'])
+
+# Procesos que ejecutan los scrapings de las ligas
+workers = LeagueWorkers(db, data_changed)
+
+# Métricas en /metrics
+mistermetrics.init_app(app, db, cache, chrome_rss)
+
+# Estáticos con huella (python -m misterassets) en las plantillas
+misterassets.init_app(app)
+
+# Miniaturas de los avatares en /img/<hash>
+misterimages.init_app(app)
 
 # ==== RUTAS ====
 # -- PORTFOLIO --
@@ -30,10 +81,24 @@ def portfolio():
     return render_template('portfolio/portfolio.html')
 
 # -- MISTER --
+# Incrusta el panel de la liga en /mister para pintar la página sin llamadas a la API
+INLINE_DASHBOARD = os.getenv('MISTER_INLINE_DASHBOARD', '1') == '1'
+
+def inline_json(body):
+    """JSON listo para ir dentro de un <script> de la plantilla."""
+    text = body.decode().replace('<', '\\u003c').replace('>', '\\u003e').replace('&', '\\u0026')
+    return Markup(text)
+
 @app.route('/mister')
 def mister():
     if request.cookies.get('authenticated') == 'true':
-        return render_template('mister/mister.html')
+        dashboard_data = None
+        if INLINE_DASHBOARD:
+            # Misma entrada de la caché que /api/mister/dashboard con la liga de la página
+            entry = cache.entry('dashboard', dashboard_response)
+            if isinstance(entry, CachedResponse):
+                dashboard_data = inline_json(entry.body)
+        return render_template('mister/mister.html', dashboard=dashboard_data)
     else:
         return redirect(url_for('misterlogin'))
 
@@ -50,44 +115,173 @@ def misterlogin():
     return render_template('mister/misterlogin.html')
 
 # ==== API ====
+# -- LIGAS --
+# Liga de /mister y de la API cuando no se indica ?league=<slug>
+DEFAULT_LEAGUE = os.getenv('MISTER_DEFAULT_LEAGUE', 'avq')
+# Segundos mínimos entre dos recargas de las ligas cuando se pide un slug desconocido
+LEAGUES_RELOAD_INTERVAL = int(os.getenv('MISTER_LEAGUES_RELOAD_INTERVAL', 60))
+
+def load_leagues():
+    try:
+        return get_leagues(db)
+    except Exception as e:
+        logging.error(f"Error al cargar las ligas: {e}")
+        return {}
+
+leagues = load_leagues()
+leagues_lock = threading.Lock()
+leagues_loaded_at = time.monotonic()
+snapshots.set_default(DEFAULT_LEAGUE)
+
+def reload_leagues():
+    """Vuelve a leer las ligas, como mucho una vez cada LEAGUES_RELOAD_INTERVAL segundos.
+
+    Las ligas creadas con add-league aparecen sin reiniciar la app, y los slugs que
+    no existen no lanzan una consulta en cada petición.
+    """
+    global leagues_loaded_at
+    with leagues_lock:
+        if time.monotonic() - leagues_loaded_at >= LEAGUES_RELOAD_INTERVAL:
+            leagues_loaded_at = time.monotonic()
+            leagues.update(load_leagues())
+    return leagues
+
+def request_league():
+    """Liga indicada con ?league=<slug> o la liga por defecto; None si no existe."""
+    slug = request.args.get('league') or DEFAULT_LEAGUE
+    league = leagues.get(slug)
+    if league is None:
+        league = reload_leagues().get(slug)
+    return league
+
+def league_not_found():
+    return {"message": "League not found"}, 404
+
+def refresh_snapshots(league):
+    """Publica los snapshots de la liga si sus datos han cambiado o aún no tiene ninguno."""
+    if league['slug'] in stale_snapshots or not snapshots.published(league['slug']):
+        stale_snapshots.discard(league['slug'])
+        publish_snapshots(league)
+
+def publish_snapshots(league):
+    """Publica las respuestas de lectura de la liga (jornadas, lista de jornadas y deudas)."""
+    if not snapshots.enabled:
+        return
+    files = {}
+
+    def render(path, view, **args):
+        with app.test_request_context(query_string={'league': league['slug'], **args}):
+            response = make_response(view())
+        if response.status_code == 200:
+            files[path] = response.get_data()
+
+    try:
+        render('numjornadas.json', num_jornadas)
+        for num in get_rounds(db, league['id']) or {}:
+            render(f"jornada/{num}.json", obtener_puntos, jornada=num)
+        render('deudas.json', debts_list)
+        render('dashboard.json', dashboard)
+        snapshots.publish(league['slug'], files)
+    except Exception as e:
+        logging.error(f"Error al publicar los snapshots de {league['slug']}: {e}", exc_info=True)
+
 # -- MISTER --
+def update_points(job, league, full=False):
+    """Trabajo de actualización de los puntos de las jornadas de una liga."""
+    try:
+        return workers.run(job, refresh_points, league, full=full)
+    finally:
+        refresh_snapshots(league)
+
+def update_players(job, league):
+    """Trabajo de actualización de la lista de jugadores de una liga."""
+    try:
+        return workers.run(job, refresh_players, league)
+    finally:
+        refresh_snapshots(league)
+
+def job_accepted(job):
+    return {"job_id": job.id, "status": job.status}, 202, {"Location": url_for('job_status', job_id=job.id)}
+
+# Actualización automática de cada liga; los clics en "actualizar" se unen a ella.
+# Los arranques se escalonan para no scrapear todas las ligas a la vez
+schedulers = {}
+
+def league_scheduler(league, first_run=None):
+    slug = league['slug']
+    if slug not in schedulers:
+        schedulers[slug] = RefreshScheduler(
+            jobs, f"misterupdate:{slug}", partial(update_points, league=league),
+            min_interval=max(REFRESH_MIN_INTERVAL, league['min_refresh_interval']),
+            coalesce=league['min_refresh_interval'],
+            first_run=first_run,
+        )
+    return schedulers[slug]
+
+if SCHEDULER_ENABLED:
+    for position, league in enumerate(leagues.values()):
+        league_scheduler(league, first_run=REFRESH_MIN_INTERVAL * (position + 1) / len(leagues)).start()
+
 @app.route('/api/misterupdate', methods=['POST'])
 def misterupdate():
-    success, jornadas = get_all_jornada_points()
-    if not success:
-        logging.error("Error updating jornada points")
-        return {"message": "Error Updating"}, 400
-
-    success = upsert_points(db, jornadas)
-    if success:
-        return {"message": "OK"}, 200
-    else:
-        logging.error("Error inserting/updating points")
-        return {"message": "Error Updating"}, 400
+    league = request_league()
+    if league is None:
+        return league_not_found()
+    # ?full=1 fuerza la recarga de todas las jornadas, incluidas las cerradas
+    full = request.args.get('full', '').lower() in ('1', 'true')
+    scheduler = league_scheduler(league)
+    return job_accepted(scheduler.trigger(full=True) if full else scheduler.trigger())
 
 @app.route('/api/playersupdate', methods=['POST'])
 def playersupdate():
-    success, players = get_player_list()
-    if not success:
-        logging.error("Error updating player list")
-        return {"message": "Error Updating"}, 400
+    league = request_league()
+    if league is None:
+        return league_not_found()
+    return job_accepted(jobs.submit(f"playersupdate:{league['slug']}", update_players, league))
 
-    success = upsert_player(db, players)
-    if success:
-        return {"message": "OK"}, 200
-    else:
-        logging.error("Error inserting/updating players")
-        return {"message": "Error Updating"}, 400
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return {"message": "Job not found"}, 404
+    return jsonify(job.to_dict()), 200
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """Progreso de un trabajo como server-sent events hasta que termina."""
+    job = jobs.get(job_id)
+    if job is None:
+        return {"message": "Job not found"}, 404
+
+    def stream():
+        revision = None
+        while True:
+            current = job.wait_for_change(revision, timeout=15)
+            if current == revision:
+                yield ": ping\n\n"
+                continue
+            revision = current
+            yield f"data: {json.dumps(job.to_dict())}\n\n"
+            if not job.active:
+                return
+
+    return Response(stream(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def standings(rows):
+    return [
+        {'username': item[0], 'name': item[1], 'img': item[2], 'points': item[3], 'debt': item[4]} for item in rows
+    ]
 
 @app.route('/api/jornada', methods=['GET'])
+@cache.cached
 def obtener_puntos():
+    league = request_league()
+    if league is None:
+        return league_not_found()
     jornada = request.args.get('jornada')
     try:
         
-        jornada_points = get_jornada(db, int(jornada))
-        jornada_points = [
-            {'username': item[0], 'name': item[1], 'img': item[2], 'points': item[3], 'debt': item[4]} for item in jornada_points
-        ]
+        jornada_points = standings(get_jornada(db, int(jornada), league['id']))
         if jornada_points:
             return jsonify(jornada_points), 200
         else:
@@ -99,30 +293,119 @@ def obtener_puntos():
         return {"message": "Error"}, 500
 
 @app.route('/api/numjornadas', methods=['GET'])
+@cache.cached
 def num_jornadas():
+    league = request_league()
+    if league is None:
+        return league_not_found()
     try:
-        return jsonify(get_rounds(db)), 200
+        return jsonify(get_rounds(db, league['id'])), 200
     except Exception as e:
         logging.error(f"Error retrieving rounds: {e}")
         return {"message": "Error"}, 500
 
 @app.route('/api/deudas', methods=['GET'])
+@cache.cached
 def debts_list():
+    league = request_league()
+    if league is None:
+        return league_not_found()
     try:
-        return jsonify(get_debts(db)), 200
+        payload = get_debts_json(db, league['id'])
+        if payload is not None:
+            return app.response_class(payload, mimetype='application/json'), 200
+        return jsonify(get_debts(db, league['id'])), 200
     except Exception as e:
         logging.error(f"Error retrieving rounds: {e}")
         return {"message": "Error"}, 500
 
+def dashboard_response():
+    """Jornadas, clasificación de la jornada pedida (por defecto la última) y deudas de la liga."""
+    league = request_league()
+    if league is None:
+        return league_not_found()
+    jornada = request.args.get('jornada')
+    try:
+        num = int(jornada) if jornada else None
+    except ValueError:
+        return {"message": "Invalid jornada number"}, 400
+
+    data = get_dashboard(db, num, league['id'])
+    if data is None:
+        return {"message": "Error"}, 500
+    if num is not None and not data['standings']:
+        return {"message": "Jornada not found"}, 404
+    data['standings'] = standings(data['standings'])
+    return jsonify(data), 200
+
+@app.route('/api/mister/dashboard', methods=['GET'])
+@cache.cached
+def dashboard():
+    return dashboard_response()
+
 @app.route('/api/calcdebts', methods=['GET'])
 def debts_calc():
+    league = request_league()
+    if league is None:
+        return league_not_found()
     try:
-        calcular_y_actualizar_deudas(db)
+        calcular_y_actualizar_deudas(db, league['id'])
+        data_changed(league)
+        refresh_snapshots(league)
         return {"message": "OK"}, 200
     except Exception as e:
         logging.error(f"Error retrieving rounds: {e}")
         return {"message": "Error"}, 500
 
 
+# ==== COMANDOS ====
+@app.cli.command('truncatedb')
+def truncatedb_command():
+    """Vacía todas las tablas de la liga."""
+    run_script(db, TRUNCATE_SCRIPT)
+    cache.invalidate()
+    snapshots.clear()
+    print("Tablas vaciadas.")
+
+@app.cli.command('add-league')
+@click.argument('slug')
+@click.argument('name')
+@click.argument('credentials_env')
+@click.option('--min-interval', default=60, help="Segundos mínimos entre dos scrapings de la liga.")
+def add_league_command(slug, name, credentials_env, min_interval):
+    """Da de alta una liga cuyas credenciales están en CREDENTIALS_ENV_USERNAME/_PASSWORD."""
+    add_league(db, slug, name, credentials_env, min_interval)
+    print(f"Liga {slug} creada; la API la servirá en menos de {LEAGUES_RELOAD_INTERVAL} s "
+          "y se actualizará automáticamente tras reiniciar la app.")
+
+@app.cli.command('map-name')
+@click.argument('slug')
+@click.argument('username')
+@click.argument('name')
+def map_name_command(slug, username, name):
+    """Asigna el nombre real NAME al usuario USERNAME de Mister en la liga SLUG."""
+    league = load_leagues().get(slug)
+    if league is None:
+        raise SystemExit(f"No existe la liga {slug}.")
+    set_name_mapping(db, league['id'], username, name)
+    print("Nombre guardado; se aplicará en la próxima actualización de jugadores.")
+
+@app.cli.command('publish-snapshots')
+def publish_snapshots_command():
+    """Publica los snapshots de lectura de todas las ligas."""
+    for league in load_leagues().values():
+        publish_snapshots(league)
+
+@app.cli.command('check-indexes')
+def check_indexes_command():
+    """Comprueba con EXPLAIN que las lecturas de la API usan índices."""
+    problems = check_read_indexes(db)
+    for query, table in problems:
+        print(f"{query}: recorrido completo de {table}")
+    if problems:
+        raise SystemExit(1)
+    print("Todas las lecturas usan índices.")
+
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0')
\ No newline at end of file
@@ -0,0 +1,77 @@
+"""Micro-benchmark de la extracción de standings: una llamada por campo frente a una sola llamada.
+
+Uso (desde app/): python -m bench.bench_extraction --players 10 100 --repeat 5
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from selenium.webdriver.common.by import By
+from misterdriver import start_driver
+from misterparser import parse_jornada_points, parse_user_list
+from misterscrapper import (
+    JORNADA_BUTTON, get_user_list, get_jornada_points,
+    extract_user_list, extract_jornada_points, wait_for_standings,
+)
+from bench.synthetic import synthetic_league, standings_html
+
+def _time(fn, repeat):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), result
+
+def bench_players(driver, num_players, repeat):
+    _, rounds = synthetic_league(num_players, 1)
+    with tempfile.NamedTemporaryFile('w', suffix='.html', delete=False) as f:
+        f.write(standings_html(rounds))
+    try:
+        driver.get(f"file://{f.name}")
+        results = {}
+
+        wait_for_standings(driver, jornada=False)
+        elements_time, elements = _time(lambda: get_user_list(driver), repeat)
+        script_time, script = _time(lambda: extract_user_list(driver), repeat)
+        source_time, source = _time(lambda: parse_user_list(driver.page_source), repeat)
+        assert elements == script, "extract_user_list no coincide"
+        results['user_list'] = {'elements': elements_time, 'script': script_time, 'page_source': source_time}
+
+        driver.find_element(By.XPATH, JORNADA_BUTTON).click()
+        wait_for_standings(driver, jornada=True)
+        elements_time, elements = _time(lambda: get_jornada_points(driver), repeat)
+        script_time, script = _time(lambda: extract_jornada_points(driver), repeat)
+        source_time, source = _time(lambda: parse_jornada_points(driver.page_source), repeat)
+        assert elements == script == source, "extract_jornada_points no coincide"
+        results['jornada_points'] = {'elements': elements_time, 'script': script_time, 'page_source': source_time}
+
+        return results
+    finally:
+        os.remove(f.name)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--players', type=int, nargs='+', default=[10, 50, 100])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    driver = start_driver()
+    try:
+        report = {n: bench_players(driver, n, args.repeat) for n in args.players}
+    finally:
+        driver.quit()
+
+    for n, results in report.items():
+        for name, times in results.items():
+            speedup = times['elements'] / times['script'] if times['script'] else float('inf')
+            print(f"{n:>5} jugadores  {name:<15} elements {times['elements'] * 1000:8.1f} ms  "
+                  f"script {times['script'] * 1000:8.1f} ms  page_source {times['page_source'] * 1000:8.1f} ms  "
+                  f"(x{speedup:.1f})")
+    print(json.dumps(report, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""Benchmark de las miniaturas de los avatares con el servidor local de bench.standin.
+
+Mide la primera actualización de jugadores (descarga y reducción de cada avatar)
+y las siguientes (todos en la caché), y compara el tamaño de las miniaturas con
+el de los avatares originales.
+
+Uso (desde app/): python -m bench.bench_images --players 10 100 --repeat 5
+"""
+import argparse
+import copy
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime
+import misterparser
+from misterhttp import HttpBackend
+from misterimages import ImageStore
+from bench.synthetic import synthetic_league
+from bench.standin import serve
+from bench.report import git_commit, save_results
+
+def _measure(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+def bench_images(num_players, repeat):
+    _, rounds = synthetic_league(num_players, 1)
+    server, base_url = serve(rounds)
+    # Los avatares por defecto también salen del servidor local
+    misterparser.PLACEHOLDER_AVATAR_URL = f"{base_url}/placeholder"
+    backend = HttpBackend('bench@example.invalid', 'bench', base_url=base_url)
+    try:
+        backend.open()
+        players = backend.get_user_list()
+        original_bytes = sum(len(backend.session.get(p['profile_image']).content) for p in players)
+
+        with tempfile.TemporaryDirectory() as root:
+            store = ImageStore(root)
+            cold = _measure(store.localize, copy.deepcopy(players))
+            warm = [_measure(store.localize, copy.deepcopy(players)) for _ in range(repeat)]
+            thumbnail_bytes = sum(
+                entry.stat().st_size for entry in os.scandir(root) if entry.name.endswith('.webp')
+            )
+        return {
+            'players': len(players),
+            'localize_cold': cold,
+            'localize_warm': statistics.median(warm),
+            'original_bytes': original_bytes,
+            'thumbnail_bytes': thumbnail_bytes,
+        }
+    finally:
+        backend.close()
+        server.shutdown()
+        server.server_close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--players', type=int, nargs='+', default=[10, 100])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    report = {
+        'commit': git_commit(),
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'args': vars(args),
+        'scales': {},
+    }
+    for num_players in args.players:
+        results = bench_images(num_players, args.repeat)
+        report['scales'][str(num_players)] = results
+        print(f"{num_players:>6} jugadores  primera {results['localize_cold'] * 1000:9.1f} ms  "
+              f"siguientes {results['localize_warm'] * 1000:7.1f} ms  "
+              f"{results['original_bytes'] / 1024:8.1f} KB -> {results['thumbnail_bytes'] / 1024:6.1f} KB")
+
+    save_results(report, f"images_{report['commit'] or 'nogit'}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+"""Benchmark del pipeline scraping → upsert → deudas con ligas sintéticas.
+
+Mide por separado el parseo de las jornadas (servidas por un servidor local que
+imita a Mister), la escritura de los puntos sin las deudas (toda la temporada en
+una transacción y jornada a jornada con upsert_round, como al actualizar),
+calcular_y_actualizar_deudas y get_debts, y guarda los resultados en
+bench/results/ para comparar entre commits.
+
+Necesita un MySQL de usar y tirar, que se vacía en cada escala:
+
+    docker run -d --name avq-bench -p 3307:3306 -e MYSQL_ROOT_PASSWORD=bench \\
+        -e MYSQL_DATABASE=avqbench mysql:9.0
+
+Uso (desde app/):
+    python -m bench.bench_pipeline --players 10 100 1000 --rounds 38 380
+    python -m bench.bench_pipeline --compare bench/results/<anterior>.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import time
+from datetime import datetime
+from misterhttp import HttpBackend
+from misterparser import parse_jornada_points
+from db.mister.misterpool import MySQLPool
+from db.mister.migrate import run_migrations, run_script, TRUNCATE_SCRIPT
+from db.mister.misterdb import (
+    DEFAULT_LEAGUE_ID, upsert_player, upsert_round, _write_points, calcular_y_actualizar_deudas, get_debts,
+)
+from bench.synthetic import synthetic_league, scraped_jornadas, gameweek_code
+from bench.standin import serve
+from bench.report import git_commit, save_results
+
+def bench_db():
+    """Pool de conexiones a la base de datos del benchmark (variables BENCH_MYSQL_*)."""
+    name = os.getenv('BENCH_MYSQL_DB', 'avqbench')
+    if name == os.getenv('MYSQL_DATABASE'):
+        raise SystemExit(f"BENCH_MYSQL_DB apunta a la base de datos de la app ({name}); el benchmark la vaciaría.")
+    return MySQLPool(
+        size=1,
+        host=os.getenv('BENCH_MYSQL_HOST', '127.0.0.1'),
+        port=int(os.getenv('BENCH_MYSQL_PORT', 3307)),
+        user=os.getenv('BENCH_MYSQL_USER', 'root'),
+        passwd=os.getenv('BENCH_MYSQL_PASSWORD', 'bench'),
+        db=name,
+        charset='utf8mb4',
+    )
+
+def _measure(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+def write_points(db, jornadas):
+    with db.cursor() as cur:
+        _write_points(cur, jornadas, DEFAULT_LEAGUE_ID)
+
+def upsert_rounds(db, jornadas):
+    for num, jornada in sorted(jornadas.items()):
+        upsert_round(db, num, jornada)
+
+def _stats(samples):
+    return {
+        'median': statistics.median(samples),
+        'min': min(samples),
+        'max': max(samples),
+        'n': len(samples),
+    }
+
+def bench_parse(rounds, sample):
+    """Descarga y parseo de las últimas `sample` jornadas desde el servidor local."""
+    nums = sorted(rounds)[-sample:]
+    server, base_url = serve(rounds, nums)
+    backend = HttpBackend('bench@example.invalid', 'bench', base_url=base_url)
+    try:
+        backend.open()
+        codes = [gameweek_code(num) for num in nums]
+        pages = [backend.session.get(f"{base_url}/standings", params={'gw': code}).text for code in codes]
+        return {
+            'fetch_and_parse': _stats([_measure(backend.get_jornada_points, code) for code in codes]),
+            'parse': _stats([_measure(parse_jornada_points, page) for page in pages]),
+        }
+    finally:
+        backend.close()
+        server.shutdown()
+        server.server_close()
+
+def bench_database(db, players, rounds, repeat):
+    """Escritura de una temporada completa y cálculo y lectura de las deudas."""
+    run_script(db, TRUNCATE_SCRIPT)
+    upsert_player(db, [
+        {'username': username, 'name': username, 'profile_image': ''} for username in players
+    ])
+    jornadas = scraped_jornadas(rounds)
+    results = {}
+
+    # Solo la escritura de los puntos: primera carga (inserta todo) y con los mismos datos
+    results['write_points'] = _stats([_measure(write_points, db, jornadas)])
+    results['write_points_unchanged'] = _stats([_measure(write_points, db, jornadas) for _ in range(repeat)])
+    # Una transacción por jornada, como refresh_points
+    results['upsert_round_unchanged'] = _stats([_measure(upsert_rounds, db, jornadas) for _ in range(repeat)])
+
+    # Deudas desde cero y sin cambios, que es el caso de cada actualización normal
+    with db.cursor() as cur:
+        cur.execute('DELETE FROM player_debts_history')
+        cur.execute('DELETE FROM debt_summary')
+    results['calcular_y_actualizar_deudas'] = _stats([_measure(calcular_y_actualizar_deudas, db)])
+    results['calcular_y_actualizar_deudas_unchanged'] = _stats(
+        [_measure(calcular_y_actualizar_deudas, db) for _ in range(repeat)]
+    )
+
+    results['get_debts'] = _stats([_measure(get_debts, db) for _ in range(repeat)])
+    with db.cursor() as cur:
+        cur.execute('DELETE FROM debt_summary')
+    results['get_debts_pivot'] = _stats([_measure(get_debts, db) for _ in range(repeat)])
+    return results
+
+def compare(current, previous):
+    """Imprime la variación de la mediana de cada medida respecto a otra ejecución."""
+    for scale, results in current['scales'].items():
+        before = previous['scales'].get(scale, {})
+        for name, stats in results.items():
+            if name not in before:
+                continue
+            old, new = before[name]['median'], stats['median']
+            change = (new - old) / old * 100 if old else 0
+            print(f"{scale:>12}  {name:<40} {old * 1000:10.2f} ms -> {new * 1000:10.2f} ms  ({change:+.1f}%)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--players', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--rounds', type=int, nargs='+', default=[38, 380])
+    parser.add_argument('--parse-rounds', type=int, default=10, help="jornadas que se descargan y parsean")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--no-db', action='store_true', help="mide solo el parseo")
+    parser.add_argument('--compare', help="fichero de resultados anterior")
+    args = parser.parse_args()
+
+    db = None
+    if not args.no_db:
+        db = bench_db()
+        run_migrations(db)
+
+    report = {
+        'commit': git_commit(),
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'args': vars(args),
+        'scales': {},
+    }
+    try:
+        for num_players in args.players:
+            for num_rounds in args.rounds:
+                scale = f"{num_players}x{num_rounds}"
+                players, rounds = synthetic_league(num_players, num_rounds)
+                results = bench_parse(rounds, args.parse_rounds)
+                if db is not None:
+                    results.update(bench_database(db, players, rounds, args.repeat))
+                report['scales'][scale] = results
+                for name, stats in results.items():
+                    print(f"{scale:>12}  {name:<40} {stats['median'] * 1000:10.2f} ms")
+    finally:
+        if db is not None:
+            db.close()
+
+    save_results(report, f"pipeline_{report['commit'] or 'nogit'}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""Comprueba que las reglas de misterdebts dan las mismas deudas que el cálculo anterior.
+
+Reproduce el algoritmo que tenía calcular_y_actualizar_deudas antes de pasar a
+misterdebts (los tres últimos de cada jornada y los empates con el tercero) y lo
+compara con calcular_historial en ligas aleatorias. Los puntos se eligen en un
+rango pequeño para que haya muchos empates. Termina con error si alguna jornada
+no coincide.
+
+Uso (desde app/): python -m bench.check_debts --rounds 20000
+"""
+import argparse
+import random
+from db.mister.misterdebts import calcular_historial, calcular_totales
+
+def deudas_anteriores(puntuaciones_jornada, jugadores):
+    """Deudas de una jornada con el algoritmo anterior: {player_id: deuda}.
+
+    Las filas llegaban de MySQL ordenadas por puntos descendentes; el orden de los
+    empates no estaba definido y aquí se fija por id, igual que en misterdebts.
+    """
+    lista_puntuaciones = sorted(puntuaciones_jornada, key=lambda x: x[1])
+    deudas_jornada = {jugador: 0 for jugador in jugadores}
+
+    ultimo, penultimo, tercer_peor = lista_puntuaciones[:3]
+
+    deudas_jornada[ultimo[0]] = 2
+    deudas_jornada[penultimo[0]] = 2
+
+    tercer_lugar_puntos = tercer_peor[1]
+    empate_tercero = [jugador for jugador, punt in lista_puntuaciones if punt == tercer_lugar_puntos]
+
+    if len(empate_tercero) == 1:
+        deudas_jornada[tercer_peor[0]] = 2
+    elif len(empate_tercero) > 1:
+        if all(jugador in [ultimo[0], penultimo[0], tercer_peor[0]] for jugador in empate_tercero):
+            for jugador in empate_tercero:
+                deudas_jornada[jugador] = 2
+        else:
+            for jugador in empate_tercero:
+                if jugador not in [ultimo[0], penultimo[0]]:
+                    deudas_jornada[jugador] = 1
+
+    return deudas_jornada
+
+def liga_aleatoria(rng, num_rounds, max_points):
+    """Filas (round_id, player_id, puntos) de una liga de 3 a 12 jugadores."""
+    jugadores = list(range(1, rng.randint(3, 12) + 1))
+    puntos = [
+        (round_id, jugador, rng.randint(0, max_points))
+        for round_id in range(1, num_rounds + 1)
+        for jugador in jugadores
+    ]
+    return jugadores, puntos
+
+def comprobar(jugadores, puntos):
+    """Devuelve las jornadas en las que los dos cálculos no coinciden."""
+    nuevo = calcular_historial(puntos, jugadores)
+
+    por_jornada = {}
+    for round_id, player_id, points in puntos:
+        por_jornada.setdefault(round_id, []).append((player_id, points))
+
+    anterior = {}
+    for round_id, filas in por_jornada.items():
+        # ORDER BY points DESC, con los empates por id ascendente
+        filas = sorted(filas, key=lambda fila: (-fila[1], fila[0]))
+        for jugador, deuda in deudas_anteriores(filas, jugadores).items():
+            anterior[(jugador, round_id)] = deuda
+
+    distintas = sorted({
+        round_id for (jugador, round_id), deuda in nuevo.items() if anterior.get((jugador, round_id)) != deuda
+    })
+    if not distintas and calcular_totales(nuevo) != calcular_totales(anterior):
+        distintas = ['totales']
+    return distintas
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=20000, help="jornadas en total")
+    parser.add_argument('--rounds-per-league', type=int, default=38)
+    parser.add_argument('--max-points', type=int, default=10, help="puntos máximos por jornada (pocos = más empates)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    checked = 0
+    leagues = 0
+    while checked < args.rounds:
+        num_rounds = min(args.rounds_per_league, args.rounds - checked)
+        jugadores, puntos = liga_aleatoria(rng, num_rounds, args.max_points)
+        distintas = comprobar(jugadores, puntos)
+        if distintas:
+            raise SystemExit(f"Liga {leagues} ({len(jugadores)} jugadores): deudas distintas en {distintas}")
+        checked += num_rounds
+        leagues += 1
+
+    print(f"{checked} jornadas en {leagues} ligas: mismas deudas con los dos cálculos.")
+
+if __name__ == '__main__':
+    main()
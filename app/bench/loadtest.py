@@ -0,0 +1,193 @@
+"""Prueba de carga de la página de Mister y su API de lectura.
+
+Cada usuario virtual repite lo que hace mister.js al abrir la página: carga
+/mister y sus estáticos y después consulta alguna jornada anterior con el
+selector. Con --no-inline pide además /api/mister/dashboard, como cuando la
+página no lleva el panel incrustado. Como un navegador,
+reutiliza la conexión y reenvía los ETag que ya tiene.
+
+Uso, con la pila de docker compose arrancada y datos cargados con bench.seed:
+    python -m bench.loadtest --url http://localhost --users 50 --duration 60 --label gunicorn
+    python -m bench.loadtest --url http://localhost --users 50 --label dev --compare bench/results/<otra>.json
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+import requests
+from bench.report import git_commit, save_results
+
+STATIC_ASSETS = [
+    '/static/css/mister/mister.css',
+    '/static/js/mister/mister.js',
+    '/static/images/mister-favicon.webp',
+]
+
+def percentile(samples, p):
+    """Percentil `p` (0-100) por el método del rango más cercano."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(p / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+class Recorder:
+    """Latencias y errores de todas las peticiones, agrupados por endpoint."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def add(self, endpoint, latency, ok):
+        with self._lock:
+            self.latencies[endpoint].append(latency)
+            if not ok:
+                self.errors[endpoint] += 1
+
+    def report(self, elapsed):
+        endpoints = {}
+        for endpoint, samples in sorted(self.latencies.items()):
+            endpoints[endpoint] = {
+                'requests': len(samples),
+                'errors': self.errors[endpoint],
+                'error_rate': self.errors[endpoint] / len(samples),
+                'throughput': len(samples) / elapsed,
+                'p50': percentile(samples, 50),
+                'p95': percentile(samples, 95),
+                'p99': percentile(samples, 99),
+            }
+        total = sum(len(samples) for samples in self.latencies.values())
+        return {
+            'elapsed': elapsed,
+            'requests': total,
+            'throughput': total / elapsed if elapsed else 0,
+            'error_rate': sum(self.errors.values()) / total if total else 0,
+            'endpoints': endpoints,
+        }
+
+class VirtualUser:
+    """Un visitante de la página de Mister con su propia sesión HTTP."""
+
+    def __init__(self, base_url, recorder, think_time, browse_prob, static, etags, inline):
+        self.base_url = base_url.rstrip('/')
+        self.recorder = recorder
+        self.think_time = think_time
+        self.browse_prob = browse_prob
+        self.static = static
+        self.etags = {} if etags else None
+        self.inline = inline
+        self.nums = None
+        self.session = requests.Session()
+        self.session.cookies.set('authenticated', 'true')
+
+    def get(self, endpoint, path, params=None):
+        headers = {}
+        key = (path, tuple(sorted((params or {}).items())))
+        if self.etags is not None and key in self.etags:
+            headers['If-None-Match'] = self.etags[key]
+
+        start = time.perf_counter()
+        try:
+            response = self.session.get(self.base_url + path, params=params, headers=headers, timeout=30)
+            body = response.content
+            ok = response.status_code < 400
+        except requests.RequestException:
+            self.recorder.add(endpoint, time.perf_counter() - start, False)
+            return None
+        self.recorder.add(endpoint, time.perf_counter() - start, ok)
+
+        if self.etags is not None and response.headers.get('ETag'):
+            self.etags[key] = response.headers['ETag']
+        if response.status_code == 200 and response.headers.get('Content-Type', '').startswith('application/json'):
+            return json.loads(body)
+        return None
+
+    def think(self):
+        time.sleep(random.uniform(0, 2 * self.think_time))
+
+    def visit(self):
+        """Una visita: carga de la página y navegación por las jornadas."""
+        self.get('/mister', '/mister')
+        if self.static:
+            for asset in STATIC_ASSETS:
+                self.get('static', asset)
+
+        if not self.inline or self.nums is None:
+            # Con el panel incrustado solo se pide la primera vez, para saber las jornadas
+            dashboard = self.get('/api/mister/dashboard', '/api/mister/dashboard') or {}
+            self.nums = sorted(dashboard.get('rounds', {}), key=int)
+        nums = self.nums
+
+        while nums and random.random() < self.browse_prob:
+            self.think()
+            self.get('/api/jornada', '/api/jornada', {'jornada': random.choice(nums)})
+
+    def run(self, deadline):
+        while time.monotonic() < deadline:
+            self.visit()
+            self.think()
+        self.session.close()
+
+def compare(current, previous):
+    """Compara p95 y rendimiento por endpoint con otra ejecución (p. ej. otro modo de servidor)."""
+    print(f"{'endpoint':<20} {previous['label']:>24} {current['label']:>24}")
+    for endpoint, stats in current['endpoints'].items():
+        before = previous['endpoints'].get(endpoint)
+        if before is None:
+            continue
+        print(f"{endpoint:<20} {before['p95'] * 1000:9.1f} ms {before['throughput']:8.1f}/s "
+              f"{stats['p95'] * 1000:9.1f} ms {stats['throughput']:8.1f}/s")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://localhost')
+    parser.add_argument('--users', type=int, default=20, help="usuarios concurrentes")
+    parser.add_argument('--duration', type=float, default=60, help="segundos de prueba")
+    parser.add_argument('--think-time', type=float, default=1, help="pausa media entre acciones (s)")
+    parser.add_argument('--browse-prob', type=float, default=0.5, help="probabilidad de consultar otra jornada")
+    parser.add_argument('--no-static', action='store_true', help="no pedir CSS ni JS")
+    parser.add_argument('--no-etags', action='store_true', help="no reenviar If-None-Match")
+    parser.add_argument('--no-inline', action='store_true', help="pedir el panel a la API en cada visita")
+    parser.add_argument('--label', default='', help="nombre de la configuración probada (p. ej. dev, gunicorn)")
+    parser.add_argument('--compare', help="fichero de resultados anterior")
+    args = parser.parse_args()
+
+    recorder = Recorder()
+    deadline = time.monotonic() + args.duration
+    users = [
+        VirtualUser(args.url, recorder, args.think_time, args.browse_prob, not args.no_static, not args.no_etags,
+                    not args.no_inline)
+        for _ in range(args.users)
+    ]
+    threads = [threading.Thread(target=user.run, args=(deadline,)) for user in users]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    report = {
+        'label': args.label,
+        'commit': git_commit(),
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'args': vars(args),
+        **recorder.report(time.monotonic() - start),
+    }
+    for endpoint, stats in report['endpoints'].items():
+        print(f"{endpoint:<20} {stats['requests']:7d} req {stats['throughput']:8.1f}/s  "
+              f"p50 {stats['p50'] * 1000:7.1f} ms  p95 {stats['p95'] * 1000:7.1f} ms  "
+              f"p99 {stats['p99'] * 1000:7.1f} ms  errores {stats['error_rate']:.1%}")
+    print(f"{'total':<20} {report['requests']:7d} req {report['throughput']:8.1f}/s  errores {report['error_rate']:.1%}")
+
+    save_results(report, f"loadtest_{args.label or 'sin-nombre'}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,24 @@
+"""Resultados de los benchmarks: se guardan en bench/results/ para comparar entre commits."""
+import json
+import os
+import subprocess
+from datetime import datetime
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def save_results(report, name):
+    """Guarda el informe como JSON con la fecha en el nombre y devuelve la ruta."""
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{name}_{datetime.now():%Y%m%d-%H%M%S}.json")
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Resultados guardados en {path}")
+    return path
@@ -0,0 +1,36 @@
+"""Carga una liga sintética en la base de datos de la app para las pruebas de carga.
+
+Vacía las tablas de la liga antes de cargarla. Uso (dentro del contenedor web):
+    python -m bench.seed --players 10 --rounds 38 --yes
+"""
+import argparse
+from app import db, cache, snapshots, publish_snapshots, load_leagues
+from db.mister.migrate import run_script, TRUNCATE_SCRIPT
+from db.mister.misterdb import upsert_player, upsert_points
+from bench.synthetic import synthetic_league, scraped_jornadas
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--players', type=int, default=10)
+    parser.add_argument('--rounds', type=int, default=38)
+    parser.add_argument('--yes', action='store_true', help="confirma que se pueden borrar los datos actuales")
+    args = parser.parse_args()
+
+    if not args.yes:
+        raise SystemExit("Esto borra los datos de la liga; vuelve a ejecutarlo con --yes.")
+
+    players, rounds = synthetic_league(args.players, args.rounds)
+    run_script(db, TRUNCATE_SCRIPT)
+    upsert_player(db, [
+        {'username': username, 'name': username.capitalize(), 'profile_image': ''} for username in players
+    ])
+    if not upsert_points(db, scraped_jornadas(rounds)):
+        raise SystemExit("Error al cargar las jornadas.")
+    cache.invalidate()
+    snapshots.clear()
+    for league in load_leagues().values():
+        publish_snapshots(league)
+    print(f"Liga sintética cargada: {args.players} jugadores, {args.rounds} jornadas.")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""Servidor local que imita las páginas de Mister que usa HttpBackend.
+
+Sirve el login, /feed y /standings (con ?gw=<código>) de una liga sintética, y
+también los avatares de sus jugadores (/avatars/<usuario>.png) y los avatares por
+defecto (/placeholder, como ui-avatars.com; MISTER_PLACEHOLDER_AVATAR_URL).
+"""
+import hashlib
+import io
+import threading
+from PIL import Image
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from misterhttp import MISTER_LOGIN_PATH
+from bench.synthetic import gameweek_code, league_totals, standings_html
+
+SESSION_COOKIE = 'standin_session=ok'
+# Lado de los avatares servidos, mayor que la miniatura como los de Mister
+AVATAR_SIZE = 256
+
+def avatar_png(seed, size=AVATAR_SIZE):
+    """Avatar PNG de un color fijo para cada `seed`."""
+    color = '#' + hashlib.sha256(seed.encode()).hexdigest()[:6]
+    out = io.BytesIO()
+    Image.new('RGB', (size, size), color).save(out, format='PNG')
+    return out.getvalue()
+
+class StandinHandler(BaseHTTPRequestHandler):
+    # Se rellena en serve(): {código: html} y la página sin jornada
+    pages = {}
+    latest = ''
+
+    def log_message(self, format, *args):
+        pass
+
+    def _logged_in(self):
+        return SESSION_COOKIE in self.headers.get('Cookie', '')
+
+    def _send(self, status, body=b'', headers=()):
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _html(self, html):
+        self._send(200, html.encode(), [('Content-Type', 'text/html; charset=utf-8')])
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(length)
+        if urlparse(self.path).path != MISTER_LOGIN_PATH:
+            return self._send(404)
+        self._send(302, headers=[('Location', '/feed'), ('Set-Cookie', f'{SESSION_COOKIE}; Path=/')])
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path in ('/feed', '/standings') and not self._logged_in():
+            return self._send(302, headers=[('Location', '/login')])
+        if url.path == '/login':
+            return self._html('<html><body>login</body></html>')
+        if url.path == '/feed':
+            return self._html('<html><body>feed</body></html>')
+        if url.path.startswith('/avatars/') or url.path == '/placeholder':
+            return self._send(200, avatar_png(self.path), [('Content-Type', 'image/png')])
+        if url.path == '/standings':
+            code = parse_qs(url.query).get('gw', [None])[0]
+            if code is None:
+                return self._html(self.latest)
+            if code not in self.pages:
+                return self._send(404)
+            return self._html(self.pages[code])
+        self._send(404)
+
+def serve(rounds, nums=None, host='127.0.0.1', port=0):
+    """Arranca el servidor en un hilo y devuelve (servidor, url base).
+
+    Las páginas de las jornadas `nums` (todas por defecto) se generan al arrancar
+    para que su coste no cuente en las medidas.
+    """
+    totals = league_totals(rounds)
+    handler = type('Handler', (StandinHandler,), {})
+    server = ThreadingHTTPServer((host, port), handler)
+    base_url = f"http://{host}:{server.server_address[1]}"
+    # Los avatares de las páginas apuntan al propio servidor
+    handler.pages = {
+        gameweek_code(num): standings_html(rounds, num, totals, avatar_base=base_url) for num in (nums or rounds)
+    }
+    handler.latest = standings_html(rounds, totals=totals, avatar_base=base_url)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, base_url
@@ -0,0 +1,90 @@
+"""Ligas sintéticas y páginas de standings con la misma estructura que Mister."""
+import html
+import random
+
+# Servidor de los avatares de las páginas; bench.standin sirve los suyos
+AVATAR_BASE_URL = 'https://example.invalid'
+
+def synthetic_league(num_players, num_rounds, seed=0):
+    """Genera una liga: lista de usernames y {num: [(username, puntos)]} por jornada."""
+    rng = random.Random(seed)
+    players = [f"user{i:04d}" for i in range(1, num_players + 1)]
+    rounds = {
+        num: [(player, rng.randint(0, 120)) for player in players]
+        for num in range(1, num_rounds + 1)
+    }
+    return players, rounds
+
+def scraped_jornadas(rounds):
+    """Jornadas en el formato que devuelve el scraper: {num: [{username, points}]}."""
+    return {
+        num: [{'username': username, 'points': f"{points} pts"} for username, points in scores]
+        for num, scores in rounds.items()
+    }
+
+def gameweek_code(num):
+    return f"gw{num:03d}"
+
+def _user_item(position, username, points, with_image, avatar_base):
+    if with_image:
+        pic = f'<img src="{avatar_base}/avatars/{html.escape(username)}.png">'
+    else:
+        pic = f'<span>{html.escape(username[:2].upper())}</span>'
+    return (
+        f'<li><div class="position">{position}</div>'
+        f'<div class="pic">{pic}</div>'
+        f'<div class="info"><div class="name">{html.escape(username)}</div></div>'
+        f'<div class="points">{points} pts</div></li>'
+    )
+
+def _user_list(scores, avatar_base):
+    ranked = sorted(scores, key=lambda x: x[1], reverse=True)
+    items = ''.join(
+        _user_item(position, username, points, with_image=position % 3 != 0, avatar_base=avatar_base)
+        for position, (username, points) in enumerate(ranked, start=1)
+    )
+    return f'<ul class="user-list">{items}</ul>'
+
+def league_totals(rounds):
+    """Puntos totales de cada jugador en todas las jornadas."""
+    totals = {}
+    for scores in rounds.values():
+        for username, points in scores:
+            totals[username] = totals.get(username, 0) + points
+    return totals
+
+def standings_html(rounds, num=None, totals=None, avatar_base=AVATAR_BASE_URL):
+    """Página de standings con la clasificación general y la de la jornada `num`.
+
+    Como en Mister, los dos paneles están en el DOM y los botones solo cambian
+    cuál se ve; sin `num` se muestra la última jornada. `totals` evita recalcular
+    la clasificación general al generar muchas páginas.
+    """
+    num = num or max(rounds)
+    totals = totals or league_totals(rounds)
+
+    options = ''.join(
+        f'<option value="{gameweek_code(n)}"{" selected" if n == num else ""}>Jornada {n}</option>'
+        for n in sorted(rounds)
+    )
+    return f'''<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Standings</title></head>
+<body>
+<div id="inner-content">
+  <div><div><div>
+    <button onclick="show('total')">General</button>
+    <button onclick="show('gameweek')">Jornada</button>
+  </div></div></div>
+  <div class="panel panel-total">{_user_list(list(totals.items()), avatar_base)}</div>
+  <div class="panel panel-gameweek" style="display: none">
+    <select>{options}</select>
+    {_user_list(rounds[num], avatar_base)}
+  </div>
+</div>
+<script>
+function show(panel) {{
+  document.querySelector('.panel-total').style.display = panel === 'total' ? '' : 'none';
+  document.querySelector('.panel-gameweek').style.display = panel === 'gameweek' ? '' : 'none';
+}}
+</script>
+</body></html>'''
@@ -0,0 +1,110 @@
+import logging
+import os
+import time
+import MySQLdb
+from db.mister.misterdb import (
+    JORNADA_QUERY, CLOSED_ROUNDS_QUERY, ROUNDS_QUERY, DEBT_SUMMARY_QUERY, DEBT_POINTS_QUERY, DEBT_HISTORY_QUERY,
+)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), 'migrations')
+TRUNCATE_SCRIPT = os.path.join(os.path.dirname(__file__), 'truncatedb.sql')
+
+# Segundos que se espera a que MySQL acepte conexiones al arrancar
+STARTUP_TIMEOUT = int(os.getenv('MYSQL_STARTUP_TIMEOUT', 60))
+
+def split_statements(sql):
+    """Divide un script SQL en sentencias, ignorando las líneas de comentario."""
+    lines = [line for line in sql.splitlines() if not line.strip().startswith('--')]
+    return [statement.strip() for statement in '\n'.join(lines).split(';') if statement.strip()]
+
+def run_script(db, path):
+    """Ejecuta todas las sentencias de un fichero SQL en una misma conexión."""
+    with open(path) as f:
+        statements = split_statements(f.read())
+
+    with db.cursor() as cur:
+        for statement in statements:
+            cur.execute(statement)
+
+def pending_migrations(applied):
+    """Migraciones del directorio aún no aplicadas, en orden de versión."""
+    for file_name in sorted(os.listdir(MIGRATIONS_DIR)):
+        version, ext = os.path.splitext(file_name)
+        if ext == '.sql' and version not in applied:
+            yield version, os.path.join(MIGRATIONS_DIR, file_name)
+
+def run_migrations(db):
+    """Aplica las migraciones pendientes.
+
+    Un bloqueo con nombre de MySQL evita que varios workers migren a la vez. Las
+    sentencias DDL de MySQL confirman la transacción, así que cada migración se
+    registra en schema_migrations justo después de aplicarse.
+    """
+    with db.cursor() as cur:
+        cur.execute("SELECT GET_LOCK('avq_migrations', 60)")
+        if not cur.fetchone()[0]:
+            raise RuntimeError("No se ha podido obtener el bloqueo de migraciones.")
+        try:
+            cur.execute('''
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version VARCHAR(100) PRIMARY KEY,
+                    applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            cur.execute('SELECT version FROM schema_migrations')
+            applied = {row[0] for row in cur.fetchall()}
+
+            for version, path in pending_migrations(applied):
+                logging.info(f"Aplicando migración {version}")
+                with open(path) as f:
+                    for statement in split_statements(f.read()):
+                        cur.execute(statement)
+                cur.execute('INSERT INTO schema_migrations (version) VALUES (%s)', (version,))
+                cur.connection.commit()
+        finally:
+            cur.execute("SELECT RELEASE_LOCK('avq_migrations')")
+            cur.fetchall()
+
+def migrate_on_startup(db):
+    """Aplica las migraciones al arrancar, esperando a que MySQL esté disponible."""
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while True:
+        try:
+            run_migrations(db)
+            return
+        except MySQLdb.OperationalError as e:
+            if time.monotonic() > deadline:
+                raise
+            logging.warning(f"MySQL no disponible todavía, reintentando: {e}")
+            time.sleep(2)
+
+# Consultas de lectura de la API que deben resolverse con índices, con parámetros de ejemplo
+READ_QUERIES = {
+    'get_jornada': (JORNADA_QUERY, (1, 1)),
+    'get_closed_rounds': (CLOSED_ROUNDS_QUERY, (1,)),
+    'get_rounds': (ROUNDS_QUERY, (1,)),
+    'get_debts_json': (DEBT_SUMMARY_QUERY, (1,)),
+    'calcular_y_actualizar_deudas': (DEBT_POINTS_QUERY, (1,)),
+    'calcular_y_actualizar_deudas_historial': (DEBT_HISTORY_QUERY, (1,)),
+}
+
+# Tablas que pueden leerse enteras. Jugadores y jornadas crecen con el número de
+# ligas, así que sus lecturas también tienen que ir por índice
+FULL_SCAN_ALLOWED = {'leagues'}
+
+def check_read_indexes(db):
+    """Ejecuta EXPLAIN sobre las consultas de lectura y devuelve los recorridos sin índice.
+
+    Devuelve una lista de (consulta, tabla) con las tablas grandes que se leen
+    completas (type = ALL); vacía si todas las lecturas usan índices.
+    """
+    problems = []
+    with db.cursor(readonly=True) as cur:
+        for name, (query, params) in READ_QUERIES.items():
+            cur.execute('EXPLAIN ' + query, params)
+            columns = [column[0] for column in cur.description]
+            for row in cur.fetchall():
+                plan = dict(zip(columns, row))
+                if plan.get('type') == 'ALL' and plan.get('table') not in FULL_SCAN_ALLOWED:
+                    problems.append((name, plan.get('table')))
+    return problems
@@ -0,0 +1,2 @@
+-- upsert_points() inserta y busca las jornadas por número
+ALTER TABLE rounds ADD UNIQUE KEY uq_rounds_num (num);
@@ -0,0 +1,6 @@
+-- player_debts no tenía clave única por jugador y crecía en cada recálculo:
+-- se conserva solo la fila más reciente de cada jugador
+DELETE pd FROM player_debts pd
+JOIN player_debts newer ON newer.player_id = pd.player_id AND newer.id > pd.id;
+
+ALTER TABLE player_debts ADD UNIQUE KEY uq_player_debts_player (player_id);
@@ -0,0 +1,5 @@
+-- get_jornada(): puntos de una jornada ordenados, sin leer las filas de la tabla
+ALTER TABLE player_points ADD INDEX idx_points_round (round_id, points, player_id);
+
+-- get_jornada(): deuda de cada jugador en la jornada, resuelta solo con el índice
+ALTER TABLE player_debts_history ADD INDEX idx_debts_history_cover (player_id, round_id, amount);
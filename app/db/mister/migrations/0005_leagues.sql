@@ -0,0 +1,56 @@
+-- Varias ligas en la misma base de datos: cada liga tiene sus propios jugadores,
+-- jornadas y resumen de deudas. Los datos existentes pasan a la liga 1.
+CREATE TABLE IF NOT EXISTS leagues (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    slug VARCHAR(50) NOT NULL UNIQUE,
+    name VARCHAR(100) NOT NULL,
+    -- Prefijo de las variables de entorno con las credenciales (<prefijo>_USERNAME y <prefijo>_PASSWORD)
+    credentials_env VARCHAR(50) NOT NULL,
+    -- Segundos mínimos entre dos scrapings de la liga
+    min_refresh_interval INT NOT NULL DEFAULT 60
+);
+
+INSERT INTO leagues (id, slug, name, credentials_env) VALUES (1, 'avq', 'AVQ', 'MISTER');
+
+-- Nombres reales de los usuarios de cada liga (antes NAME_MAPPING en el código)
+CREATE TABLE IF NOT EXISTS league_name_mapping (
+    league_id INT NOT NULL,
+    username VARCHAR(100) NOT NULL,
+    name VARCHAR(100) NOT NULL,
+    PRIMARY KEY (league_id, username),
+    FOREIGN KEY (league_id) REFERENCES leagues(id)
+);
+
+INSERT INTO league_name_mapping (league_id, username, name) VALUES
+    (1, 'Endika Arocena Cartagena', 'Endika'),
+    (1, '20130', 'Yago'),
+    (1, 'Ander', 'Ander'),
+    (1, 'Patricia', 'Patricia'),
+    (1, 'Galdun', 'Aitor'),
+    (1, 'YOWNETA', 'Lander'),
+    (1, 'Al3eXx', 'Alex'),
+    (1, 'Odei J', 'Odei'),
+    (1, 'Jandro', 'Alejandro');
+
+-- Jugadores y jornadas se buscan siempre dentro de su liga
+ALTER TABLE players
+    ADD COLUMN league_id INT NOT NULL DEFAULT 1 AFTER id,
+    DROP INDEX username,
+    ADD UNIQUE KEY uq_players_league_username (league_id, username),
+    ADD CONSTRAINT fk_players_league FOREIGN KEY (league_id) REFERENCES leagues(id);
+
+ALTER TABLE players ALTER COLUMN league_id DROP DEFAULT;
+
+ALTER TABLE rounds
+    ADD COLUMN league_id INT NOT NULL DEFAULT 1 AFTER id,
+    DROP INDEX name,
+    DROP INDEX uq_rounds_num,
+    ADD UNIQUE KEY uq_rounds_league_num (league_id, num),
+    ADD CONSTRAINT fk_rounds_league FOREIGN KEY (league_id) REFERENCES leagues(id);
+
+ALTER TABLE rounds ALTER COLUMN league_id DROP DEFAULT;
+
+-- Un resumen de deudas por liga
+ALTER TABLE debt_summary
+    CHANGE id league_id INT NOT NULL,
+    ADD CONSTRAINT fk_debt_summary_league FOREIGN KEY (league_id) REFERENCES leagues(id);
@@ -1,64 +1,99 @@
+import os
 import re
+import json
 import logging
 from collections import defaultdict
+from mistermetrics import timed_query
+from db.mister.misterdebts import calcular_historial, calcular_totales, diferencias, resumen_deudas
 
 # Configura el logging
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO').upper(), format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Liga de las instalaciones con una sola liga (creada por la migración 0005)
+DEFAULT_LEAGUE_ID = 1
+
+# LEAGUES
+@timed_query('get_leagues')
+def get_leagues(db):
+    """Devuelve las ligas configuradas como {slug: datos de la liga}."""
+    with db.cursor(readonly=True) as cur:
+        cur.execute('SELECT id, slug, name, credentials_env, min_refresh_interval FROM leagues ORDER BY id')
+        columns = [column[0] for column in cur.description]
+        return {row[1]: dict(zip(columns, row)) for row in cur.fetchall()}
+
+def add_league(db, slug, name, credentials_env, min_refresh_interval=60):
+    with db.cursor() as cur:
+        cur.execute('''
+            INSERT INTO leagues (slug, name, credentials_env, min_refresh_interval)
+            VALUES (%s, %s, %s, %s)
+        ''', (slug, name, credentials_env, min_refresh_interval))
+
+def set_name_mapping(db, league_id, username, name):
+    with db.cursor() as cur:
+        cur.execute('''
+            INSERT INTO league_name_mapping (league_id, username, name)
+            VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE name = VALUES(name);
+        ''', (league_id, username, name))
 
-def point_db(db, cur):
-    sql_init = '''USE avqdb'''
-    cur.execute(sql_init)
-    db.connection.commit()
+def get_name_mapping(cur, league_id):
+    """Devuelve el mapa username -> nombre real de los usuarios de una liga."""
+    cur.execute('SELECT username, name FROM league_name_mapping WHERE league_id = %s', (league_id,))
+    return dict(cur.fetchall())
 
-def get_player_id(db, username):
-    try:
-        cur = db.connection.cursor()
-        point_db(db, cur)
-        query = 'SELECT id FROM players WHERE username = %s'
-        cur.execute(query, (username,))
-        result = cur.fetchone()
-        cur.close()
-        
-        if result:
-            return result[0]
-        else:
-            return None
-            
-    except Exception as e:
-        print(f"Error al obtener el ID del jugador: {e}")
-        return None
+def get_player_ids(cur, league_id):
+    """Devuelve un mapa username -> id de todos los jugadores de una liga en una sola consulta."""
+    cur.execute('SELECT username, id FROM players WHERE league_id = %s', (league_id,))
+    return dict(cur.fetchall())
+
+def parse_points(points_str):
+    """Convierte el texto de puntos del scraper ("52 pts") en un entero."""
+    points_cleaned = re.sub(r'\D', '', points_str)
+    return int(points_cleaned) if points_cleaned else 0
 
 
 # PLAYERS
-def upsert_player(db, players):
+@timed_query('upsert_player')
+def upsert_player(db, players, league_id=DEFAULT_LEAGUE_ID):
     sql_insert = '''
-    INSERT INTO players (username, name, image)
-    VALUES (%s, %s, %s)
+    INSERT INTO players (league_id, username, name, image)
+    VALUES (%s, %s, %s, %s)
     ON DUPLICATE KEY UPDATE name = VALUES(name), image = VALUES(image);
     '''
 
     try:
-        with db.connection.cursor() as cur:
+        with db.cursor() as cur:
             logging.debug("Iniciando el proceso de upsert en la base de datos.")
-            point_db(db, cur)
+            # Los nombres reales de la liga sustituyen a los de Mister
+            names = get_name_mapping(cur, league_id)
+            cur.executemany(sql_insert, [
+                (league_id, player['username'], names.get(player['username'], player['name']), player['profile_image'])
+                for player in players
+            ])
 
-            for player in players:
-                cur.execute(sql_insert, (player['username'], player['name'], player['profile_image']))
-
-            db.connection.commit()
-            return True
+        # El resumen de deudas incluye los nombres de los jugadores
+        calcular_y_actualizar_deudas(db, league_id)
+        return True
 
     except Exception as e:
-        db.connection.rollback()
         logging.error(f"Error durante el upsert: {e}", exc_info=True)
         return False
 
+@timed_query('get_player_images')
+def get_player_images(db):
+    """Devuelve los avatares guardados de los jugadores de todas las ligas."""
+    with db.cursor(readonly=True) as cur:
+        cur.execute('SELECT DISTINCT image FROM players')
+        return {row[0] for row in cur.fetchall()}
 
-def upsert_points(db, jornadas):
+def _write_points(cur, jornadas, league_id):
+    """Guarda las jornadas {num: puntos} de una liga y los puntos de cada jugador en lote.
 
+    Devuelve las filas modificadas según MySQL (0 si los datos ya estaban guardados).
+    """
     sql_insert_round = '''
-    INSERT INTO rounds (num, name)
-    VALUES (%s, %s)
+    INSERT INTO rounds (league_id, num, name)
+    VALUES (%s, %s, %s)
     ON DUPLICATE KEY UPDATE name = VALUES(name);
     '''
 
@@ -68,47 +103,96 @@ def upsert_points(db, jornadas):
     ON DUPLICATE KEY UPDATE points = VALUES(points);
     '''
 
+    rounds = sorted(jornadas.items())
+    nums = [num for num, _ in rounds]
+    if not nums:
+        return 0
+
+    # executemany agrupa las filas en INSERT de varios VALUES
+    cur.executemany(sql_insert_round, [(league_id, num, f"Jornada {num}") for num in nums])
+    changed = cur.rowcount
+
+    placeholders = ', '.join(['%s'] * len(nums))
+    cur.execute(f"SELECT num, id FROM rounds WHERE league_id = %s AND num IN ({placeholders})", [league_id, *nums])
+    round_ids = dict(cur.fetchall())
+    player_ids = get_player_ids(cur, league_id)
+
+    rows = []
+    for num, jornada in rounds:
+        for user in jornada:
+            player_id = player_ids.get(user['username'])
+            if player_id is None:
+                logging.warning(f"Jugador desconocido en la jornada {num}: {user['username']}")
+                continue
+            rows.append((player_id, round_ids[num], parse_points(user['points'])))
+
+    if rows:
+        # ON DUPLICATE KEY UPDATE cuenta 0 filas si los puntos no cambian
+        cur.executemany(sql_insert_player_points, rows)
+        changed += cur.rowcount
+    return changed
+
+@timed_query('upsert_round')
+def upsert_round(db, num, jornada, league_id=DEFAULT_LEAGUE_ID):
+    """Guarda los puntos de una jornada en su propia transacción, sin recalcular deudas.
+
+    Devuelve las filas modificadas.
+    """
+    with db.cursor() as cur:
+        return _write_points(cur, {num: jornada}, league_id)
+
+@timed_query('upsert_points')
+def upsert_points(db, jornadas, league_id=DEFAULT_LEAGUE_ID):
     try:
-        with db.connection.cursor() as cur:
+        with db.cursor() as cur:
             logging.debug("Iniciando el proceso de upsert en la base de datos.")
-            point_db(db, cur)  # Ensure this function is defined
+            _write_points(cur, jornadas, league_id)
 
-            for x, jornada in enumerate(jornadas):
-                num = x + 1
-                cur.execute(sql_insert_round, (num, f"Jornada {num}"))
+        calcular_y_actualizar_deudas(db, league_id)
+        return True
 
-                if cur.lastrowid:
-                    round_id = cur.lastrowid
-                else:
-                    cur.execute("SELECT id FROM rounds WHERE num = %s", (num,))
-                    round_id = cur.fetchone()[0]
+    except Exception as e:
+        logging.error(f"Error durante el upsert: {e}", exc_info=True)
+        return False  # Explicitly return False in case of an error
+
+# Jornadas de una liga que ya tienen puntos guardados
+CLOSED_ROUNDS_QUERY = '''
+SELECT DISTINCT r.num
+FROM rounds r
+JOIN player_points pp ON pp.round_id = r.id
+WHERE r.league_id = %s'''
+
+# Jornadas de una liga {num: nombre}
+ROUNDS_QUERY = 'SELECT num, name FROM rounds WHERE league_id = %s ORDER BY num'
 
-                for user in jornada:
-                    player_id = get_player_id(db, user['username'])
+# Resumen de deudas precalculado de una liga
+DEBT_SUMMARY_QUERY = 'SELECT payload FROM debt_summary WHERE league_id = %s'
 
-                    points_str = user['points']
-                    points_cleaned = re.sub(r'\D', '', points_str)
-                    points = int(points_cleaned) if points_cleaned else 0
+@timed_query('get_closed_rounds')
+def get_closed_rounds(db, league_id=DEFAULT_LEAGUE_ID):
+    """Devuelve los números de las jornadas ya cerradas en la base de datos.
 
-                    cur.execute(sql_insert_player_points, (player_id, round_id, points))
+    Una jornada está cerrada si tiene puntos guardados y no es la última, que es
+    la única que todavía puede cambiar.
+    """
+    try:
+        with db.cursor(readonly=True) as cur:
+            cur.execute(CLOSED_ROUNDS_QUERY, (league_id,))
+            nums = sorted(row[0] for row in cur.fetchall())
 
-            db.connection.commit()
-            calcular_y_actualizar_deudas(db)
-            return True
+        return set(nums[:-1])
 
     except Exception as e:
-        db.connection.rollback()
-        logging.error(f"Error durante el upsert: {e}", exc_info=True)
-        return False  # Explicitly return False in case of an error
+        # Sin jornadas cerradas se vuelven a scrapear todas
+        logging.error(f"Error al leer las jornadas cerradas de la liga {league_id}; se cargarán todas: {e}", exc_info=True)
+        return set()
 
-def get_rounds(db):
+@timed_query('get_rounds')
+def get_rounds(db, league_id=DEFAULT_LEAGUE_ID):
     try:
-        cur = db.connection.cursor()
-        point_db(db, cur)
-        query = 'SELECT num, name FROM rounds'
-        cur.execute(query)
-        result = cur.fetchall()
-        cur.close()
+        with db.cursor(readonly=True) as cur:
+            cur.execute(ROUNDS_QUERY, (league_id,))
+            result = cur.fetchall()
         
         return dict(result)
             
@@ -116,36 +200,53 @@ def get_rounds(db):
         print(f"Error: {e}")
         return None
 
-def get_debts(db):
+@timed_query('get_debts_json')
+def get_debts_json(db, league_id=DEFAULT_LEAGUE_ID):
+    """Devuelve el resumen de deudas precalculado, ya serializado en JSON, o None si no existe."""
     try:
-        cur = db.connection.cursor()
-        point_db(db, cur)
-        
-        # Obtener todas las jornadas disponibles
-        cur.execute('SELECT DISTINCT num FROM rounds ORDER BY num')
-        jornadas = [row[0] for row in cur.fetchall()]
-        
-        # Construir la consulta SQL dinámicamente
-        select_clause = ', '.join(
-            [f"COALESCE(SUM(CASE WHEN r.num = {jornada} THEN pdh.amount ELSE 0 END), 0) AS Deuda_Jornada{jornada}" for jornada in jornadas]
-        )
-        
-        query = f'''
-        SELECT 
-            p.name AS Nombre_Usuario,
-            {select_clause},
-            COALESCE(SUM(pdh.amount), 0) AS Deuda_Total
-        FROM players p
-        LEFT JOIN player_debts_history pdh ON p.id = pdh.player_id
-        LEFT JOIN rounds r ON pdh.round_id = r.id
-        GROUP BY p.name
-        ORDER BY Deuda_Total DESC;'''
-
-        cur.execute(query)
-        result = cur.fetchall()
-        cur.close()
+        with db.cursor(readonly=True) as cur:
+            cur.execute(DEBT_SUMMARY_QUERY, (league_id,))
+            result = cur.fetchone()
+
+        return result[0] if result else None
+
+    except Exception as e:
+        logging.warning(f"Resumen de deudas no disponible: {e}")
+        return None
+
+@timed_query('get_debts')
+def get_debts(db, league_id=DEFAULT_LEAGUE_ID):
+    payload = get_debts_json(db, league_id)
+    if payload is not None:
+        return json.loads(payload)
+
+    # Sin resumen precalculado: se calcula la tabla dinámica sobre el historial
+    try:
+        with db.cursor(readonly=True) as cur:
+            # Obtener todas las jornadas disponibles
+            cur.execute('SELECT DISTINCT num FROM rounds WHERE league_id = %s ORDER BY num', (league_id,))
+            jornadas = [row[0] for row in cur.fetchall()]
+
+            # Construir la consulta SQL dinámicamente
+            select_clause = ', '.join(
+                [f"COALESCE(SUM(CASE WHEN r.num = {jornada} THEN pdh.amount ELSE 0 END), 0) AS Deuda_Jornada{jornada}" for jornada in jornadas]
+            )
+
+            query = f'''
+            SELECT 
+                p.name AS Nombre_Usuario,
+                {select_clause},
+                COALESCE(SUM(pdh.amount), 0) AS Deuda_Total
+            FROM players p
+            LEFT JOIN player_debts_history pdh ON p.id = pdh.player_id
+            LEFT JOIN rounds r ON pdh.round_id = r.id
+            WHERE p.league_id = %s
+            GROUP BY p.name
+            ORDER BY Deuda_Total DESC;'''
+
+            cur.execute(query, (league_id,))
+            result = cur.fetchall()
         
-        print(result)
         return result
             
     except Exception as e:
@@ -154,26 +255,27 @@ def get_debts(db):
 
 
 
-def get_jornada(db, num):
+# Clasificación de una jornada con la deuda de cada jugador
+JORNADA_QUERY = '''
+SELECT p.username, 
+    p.name, 
+    p.image, 
+    pp.points, 
+    COALESCE(dh.amount, 0) AS amount
+FROM players p
+JOIN player_points pp ON p.id = pp.player_id
+JOIN rounds r ON pp.round_id = r.id
+LEFT JOIN player_debts_history dh ON p.id = dh.player_id AND r.id = dh.round_id
+WHERE r.league_id = %s AND r.num = %s
+ORDER BY pp.points DESC;
+'''
+
+@timed_query('get_jornada')
+def get_jornada(db, num, league_id=DEFAULT_LEAGUE_ID):
     try:
-        cur = db.connection.cursor()
-        point_db(db, cur)
-        query = '''
-        SELECT p.username, 
-            p.name, 
-            p.image, 
-            pp.points, 
-            COALESCE(dh.amount, 0) AS amount
-        FROM players p
-        JOIN player_points pp ON p.id = pp.player_id
-        JOIN rounds r ON pp.round_id = r.id
-        LEFT JOIN player_debts_history dh ON p.id = dh.player_id AND r.id = dh.round_id
-        WHERE r.num = %s
-        ORDER BY pp.points DESC;
-        '''
-        cur.execute(query % num)
-        result = cur.fetchall()
-        cur.close()
+        with db.cursor(readonly=True) as cur:
+            cur.execute(JORNADA_QUERY, (league_id, num))
+            result = cur.fetchall()
         
         return result
             
@@ -181,98 +283,121 @@ def get_jornada(db, num):
         print(f"Error: {e}")
         return None
 
-def calcular_y_actualizar_deudas(db):
-    cur = db.connection.cursor()
+@timed_query('get_dashboard')
+def get_dashboard(db, num=None, league_id=DEFAULT_LEAGUE_ID):
+    """Devuelve las jornadas, la clasificación de la jornada `num` (por defecto la
+    última) y las deudas de una liga, con una sola conexión del pool.
+
+    Las deudas salen del resumen precalculado; solo si no existe se calcula la
+    tabla con `get_debts`. Devuelve None si hay un error.
+    """
     try:
-        # Vaciar la tabla de historial de deudas
-        cur.execute("DELETE FROM player_debts_history")
+        with db.cursor(readonly=True) as cur:
+            cur.execute(ROUNDS_QUERY, (league_id,))
+            rounds = dict(cur.fetchall())
+            if num is None:
+                num = max(rounds, default=None)
 
-        # Obtener todas las rondas disponibles
-        cur.execute("SELECT num FROM rounds")
-        rounds = [x[0] for x in cur.fetchall()]
+            standings = []
+            if num is not None:
+                cur.execute(JORNADA_QUERY, (league_id, num))
+                standings = cur.fetchall()
 
-        logging.info(f'Número de rondas: {rounds}')
+            cur.execute(DEBT_SUMMARY_QUERY, (league_id,))
+            payload = cur.fetchone()
 
-        # Obtener el número de jugadores
-        cur.execute("SELECT COUNT(id) FROM players")
-        num_jugadores = cur.fetchone()[0]
+        debts = json.loads(payload[0]) if payload else get_debts(db, league_id)
+        return {'rounds': rounds, 'jornada': num, 'standings': standings, 'debts': debts}
 
-        all_rounds_scores = {}
-        
-        # Obtener las puntuaciones por ronda
-        for num in rounds:
-            cur.execute("""
-                    SELECT player_id, points
-                    FROM player_points
-                    WHERE round_id = %s
-                    ORDER BY points DESC
-                """, (num,))
-            player_points = cur.fetchall()
-            logging.info(f'{num} / {player_points}')
-            all_rounds_scores[num] = player_points
-        
-        logging.info(f'Todas las puntuaciones: {all_rounds_scores}')
-        
-        deudas_acumuladas = {jugador: 0 for jugador in range(1, num_jugadores + 1)}
+    except Exception as e:
+        logging.error(f"Error al leer el panel de la liga {league_id}: {e}")
+        return None
 
-        # SQL para insertar el historial y las deudas
-        sql_insert_debts_history = '''
-            INSERT INTO player_debts_history (player_id, round_id, amount)
-            VALUES (%s, %s, %s)
-            ON DUPLICATE KEY UPDATE amount = VALUES(amount);
-        '''
-        sql_insert_debts = '''
-            INSERT INTO player_debts (player_id, amount)
-            VALUES (%s, %s)
-            ON DUPLICATE KEY UPDATE amount = amount + VALUES(amount);
-        '''
-
-        # Calcular deudas por jornada
-        for jornada, puntuaciones_jornada in all_rounds_scores.items():
-            lista_puntuaciones = sorted(puntuaciones_jornada, key=lambda x: x[1])
-            deudas_jornada = {jugador: 0 for jugador in range(1, num_jugadores + 1)}
-
-            tres_ultimos = lista_puntuaciones[:3]  # Los tres últimos jugadores
-            ultimo, penultimo, tercer_peor = tres_ultimos
-
-            deudas_jornada[ultimo[0]] = 2
-            deudas_jornada[penultimo[0]] = 2
-
-            tercer_lugar_puntos = tercer_peor[1]
-            empate_tercero = [jugador for jugador, punt in lista_puntuaciones if punt == tercer_lugar_puntos]
-
-            # Si el empate involucra solo a los tres últimos, todos suman 2
-            if len(empate_tercero) == 1:
-                deudas_jornada[tercer_peor[0]] = 2
-            elif len(empate_tercero) > 1:
-                if all(jugador in [ultimo[0], penultimo[0], tercer_peor[0]] for jugador in empate_tercero):
-                    # Si el empate solo involucra a los tres últimos, todos suman 2
-                    for jugador in empate_tercero:
-                        deudas_jornada[jugador] = 2
-                else:
-                    # Si hay empates con jugadores fuera de los tres últimos, ellos suman 1
-                    for jugador in empate_tercero:
-                        if jugador not in [ultimo[0], penultimo[0]]:
-                            deudas_jornada[jugador] = 1
-
-            # Actualizar las deudas acumuladas e insertar en las tablas
-            for jugador in range(1, num_jugadores + 1):
-                suma = deudas_jornada[jugador]
-                deudas_acumuladas[jugador] += suma
-                
-                cur.execute(sql_insert_debts_history, (jugador, jornada, suma))
-                cur.execute(sql_insert_debts, (jugador, deudas_acumuladas[jugador]))
-
-        db.connection.commit()
+# Puntos e historial de deudas de las jornadas de una liga (se les puede añadir un filtro por r.num)
+DEBT_POINTS_QUERY = '''
+SELECT pp.round_id, pp.player_id, pp.points
+FROM player_points pp
+JOIN rounds r ON r.id = pp.round_id
+WHERE r.league_id = %s'''
+
+DEBT_HISTORY_QUERY = '''
+SELECT dh.player_id, dh.round_id, dh.amount
+FROM player_debts_history dh
+JOIN rounds r ON r.id = dh.round_id
+WHERE r.league_id = %s'''
+
+@timed_query('calcular_y_actualizar_deudas')
+def calcular_y_actualizar_deudas(db, league_id=DEFAULT_LEAGUE_ID, nums=None):
+    """Recalcula las deudas de una liga y escribe solo las que han cambiado.
+
+    Las deudas de una jornada solo dependen de sus puntos, así que con `nums` se
+    recalculan únicamente esas jornadas; los totales y el resumen se rehacen con
+    el historial guardado del resto. Sin `nums` se recalculan todas (p. ej. al
+    cambiar los jugadores).
+    """
+    try:
+        with db.cursor() as cur:
+            # Cargar los puntos y el historial actual de las jornadas en una consulta cada uno
+            cur.execute("SELECT id, name FROM players WHERE league_id = %s", (league_id,))
+            nombres = dict(cur.fetchall())
+            jugadores = list(nombres)
+
+            cur.execute("SELECT id, num FROM rounds WHERE league_id = %s", (league_id,))
+            rondas = dict(cur.fetchall())
+
+            filtro, params = '', [league_id]
+            if nums is not None:
+                nums = sorted(set(nums))
+                if not nums:
+                    return "Deudas sin cambios."
+                filtro = f" AND r.num IN ({', '.join(['%s'] * len(nums))})"
+                params += nums
+
+            cur.execute(DEBT_POINTS_QUERY + filtro, params)
+            puntos = cur.fetchall()
+
+            cur.execute(DEBT_HISTORY_QUERY + filtro, params)
+            historial_actual = {(player_id, round_id): amount for player_id, round_id, amount in cur.fetchall()}
+
+            historial = calcular_historial(puntos, jugadores)
+            cambios, borrados = diferencias(historial, historial_actual)
+            logging.info(f'Deudas: {len(cambios)} filas modificadas, {len(borrados)} borradas')
+
+            # Escribir solo las diferencias, en lotes
+            if borrados:
+                cur.executemany(
+                    "DELETE FROM player_debts_history WHERE player_id = %s AND round_id = %s", borrados
+                )
+            if cambios:
+                cur.executemany('''
+                    INSERT INTO player_debts_history (player_id, round_id, amount)
+                    VALUES (%s, %s, %s)
+                    ON DUPLICATE KEY UPDATE amount = VALUES(amount);
+                ''', cambios)
+
+            if nums is not None:
+                # Totales y resumen sobre el historial completo, ya con las jornadas recalculadas
+                cur.execute(DEBT_HISTORY_QUERY, (league_id,))
+                historial = {(player_id, round_id): amount for player_id, round_id, amount in cur.fetchall()}
+
+            if cambios or borrados:
+                totales = calcular_totales(historial)
+                cur.executemany('''
+                    INSERT INTO player_debts (player_id, amount)
+                    VALUES (%s, %s)
+                    ON DUPLICATE KEY UPDATE amount = VALUES(amount);
+                ''', list(totales.items()))
+
+            # Resumen por jugador que sirve /api/deudas sin recalcular la tabla dinámica
+            payload = json.dumps(resumen_deudas(historial, nombres, rondas), separators=(',', ':'))
+            cur.execute('''
+                INSERT INTO debt_summary (league_id, payload)
+                VALUES (%s, %s)
+                ON DUPLICATE KEY UPDATE payload = VALUES(payload);
+            ''', (league_id, payload))
 
         return "Deudas calculadas y actualizadas correctamente."
 
     except Exception as e:
         logging.error(f"Error al calcular o actualizar deudas: {str(e)}")
-        db.connection.rollback()
         return f"Error al calcular o actualizar deudas: {str(e)}"
-
-    finally:
-        cur.close()
-
-
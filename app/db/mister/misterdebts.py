@@ -0,0 +1,98 @@
+from collections import defaultdict
+from decimal import Decimal
+
+# Reglas de las deudas: los dos últimos de cada jornada pagan 2 € y el tercero
+# por la cola paga 2 €, o 1 € cada uno si empata con jugadores fuera de los tres
+# últimos. Son funciones puras, sin base de datos, para poder probarlas y medirlas.
+
+DEUDA_COMPLETA = Decimal(2)
+DEUDA_EMPATE = Decimal(1)
+
+def calcular_deudas_jornada(puntuaciones):
+    """Calcula las deudas de una jornada.
+
+    `puntuaciones` es una lista de (player_id, puntos). Devuelve {player_id: deuda}
+    solo con los jugadores que deben algo.
+    """
+    if len(puntuaciones) < 3:
+        return {}
+
+    # Orden ascendente por puntos; el id desempata para que el resultado sea estable
+    lista_puntuaciones = sorted(puntuaciones, key=lambda x: (x[1], x[0]))
+    ultimo, penultimo, tercer_peor = lista_puntuaciones[:3]
+
+    deudas = {ultimo[0]: DEUDA_COMPLETA, penultimo[0]: DEUDA_COMPLETA}
+
+    empate_tercero = [jugador for jugador, punt in lista_puntuaciones if punt == tercer_peor[1]]
+    tres_ultimos = {ultimo[0], penultimo[0], tercer_peor[0]}
+
+    if len(empate_tercero) == 1 or all(jugador in tres_ultimos for jugador in empate_tercero):
+        # Sin empate, o empate solo entre los tres últimos: todos suman 2
+        for jugador in empate_tercero:
+            deudas[jugador] = DEUDA_COMPLETA
+    else:
+        # Empate con jugadores fuera de los tres últimos: suman 1
+        for jugador in empate_tercero:
+            if jugador not in (ultimo[0], penultimo[0]):
+                deudas[jugador] = DEUDA_EMPATE
+
+    return deudas
+
+def calcular_historial(puntos, jugadores):
+    """Calcula el historial de deudas de todas las jornadas.
+
+    `puntos` son filas (round_id, player_id, puntos) y `jugadores` los ids de todos
+    los jugadores. Devuelve {(player_id, round_id): deuda} con una entrada por
+    jugador y jornada, igual que la tabla player_debts_history.
+    """
+    por_jornada = defaultdict(list)
+    for round_id, player_id, points in puntos:
+        por_jornada[round_id].append((player_id, points))
+
+    historial = {}
+    for round_id, puntuaciones in por_jornada.items():
+        deudas = calcular_deudas_jornada(puntuaciones)
+        for jugador in jugadores:
+            historial[(jugador, round_id)] = deudas.get(jugador, Decimal(0))
+
+    return historial
+
+def calcular_totales(historial):
+    """Suma el historial de deudas por jugador: {player_id: total}."""
+    totales = defaultdict(Decimal)
+    for (jugador, _), deuda in historial.items():
+        totales[jugador] += deuda
+    return dict(totales)
+
+def diferencias(nuevo, actual):
+    """Compara dos historiales y devuelve (filas a escribir, claves a borrar).
+
+    Solo se escriben las entradas cuya deuda ha cambiado, de modo que una
+    actualización que solo toca la jornada en curso solo reescribe esa jornada.
+    """
+    cambios = [(jugador, round_id, deuda) for (jugador, round_id), deuda in nuevo.items()
+               if actual.get((jugador, round_id)) != deuda]
+    borrados = [clave for clave in actual if clave not in nuevo]
+    return cambios, borrados
+
+def resumen_deudas(historial, jugadores, rondas):
+    """Tabla de deudas por jugador, lista para servir en /api/deudas.
+
+    `jugadores` es {player_id: nombre} y `rondas` {round_id: número de jornada}.
+    Cada fila es [nombre, deuda jornada 1, ..., deuda jornada N, total] con los
+    importes como texto ("2.00"), ordenadas por deuda total descendente.
+    """
+    nums = sorted(set(rondas.values()))
+    por_jugador = defaultdict(lambda: defaultdict(Decimal))
+    for (jugador, round_id), deuda in historial.items():
+        if round_id in rondas:
+            por_jugador[jugador][rondas[round_id]] += deuda
+
+    filas = []
+    for jugador, nombre in jugadores.items():
+        deudas = por_jugador[jugador]
+        total = sum(deudas.values(), Decimal(0))
+        filas.append([nombre] + [deudas[num] for num in nums] + [total])
+
+    filas.sort(key=lambda fila: fila[-1], reverse=True)
+    return [[fila[0]] + [f"{importe:.2f}" for importe in fila[1:]] for fila in filas]
@@ -0,0 +1,162 @@
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+import MySQLdb
+
+# Conexiones abiertas como máximo por proceso
+POOL_SIZE = int(os.getenv('MYSQL_POOL_SIZE', 5))
+# Segundos de espera por una conexión libre cuando el pool está lleno
+CHECKOUT_TIMEOUT = int(os.getenv('MYSQL_POOL_TIMEOUT', 30))
+# Solo se comprueba con ping() una conexión que lleva más de estos segundos sin usarse
+PING_AFTER_IDLE = int(os.getenv('MYSQL_POOL_PING_AFTER', 30))
+
+class PooledConnection:
+    """Conexión del pool con su cursor reutilizable."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self._cursor = None
+        self.last_used = time.monotonic()
+
+    def cursor(self):
+        if self._cursor is None:
+            self._cursor = self.conn.cursor()
+        return self._cursor
+
+    def is_healthy(self):
+        try:
+            self.conn.ping()
+            return True
+        except MySQLdb.Error:
+            return False
+
+    def close(self):
+        try:
+            self.conn.close()
+        except MySQLdb.Error:
+            pass
+
+class MySQLPool:
+    """Pool acotado de conexiones MySQL con la base de datos ya seleccionada.
+
+    Se puede configurar desde una app de Flask (MYSQL_HOST, MYSQL_USER,
+    MYSQL_PASSWORD y MYSQL_DB) o pasando directamente los parámetros de conexión.
+    Las consultas se hacen con `with db.cursor() as cur:`, que abre una
+    transacción y la confirma al salir o la deshace si hay una excepción. Las
+    lecturas usan `db.cursor(readonly=True)`: las conexiones están en autocommit,
+    así que cada consulta ve los últimos datos sin más viajes a MySQL.
+    """
+
+    def __init__(self, app=None, size=POOL_SIZE, **connect_kwargs):
+        self.size = size
+        self.connect_kwargs = connect_kwargs
+        self._idle = []
+        self._total = 0
+        self._in_use = 0
+        self._cond = threading.Condition()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.connect_kwargs = {
+            'host': app.config.get('MYSQL_HOST', 'localhost'),
+            'port': int(app.config.get('MYSQL_PORT', 3306)),
+            'user': app.config.get('MYSQL_USER'),
+            'passwd': app.config.get('MYSQL_PASSWORD'),
+            'db': app.config.get('MYSQL_DB'),
+            'charset': 'utf8mb4',
+            **self.connect_kwargs,
+        }
+
+    @property
+    def in_use(self):
+        return self._in_use
+
+    def _connect(self):
+        return PooledConnection(MySQLdb.connect(autocommit=True, **self.connect_kwargs))
+
+    def checkout(self, timeout=CHECKOUT_TIMEOUT):
+        """Saca una conexión sana del pool, abriendo una nueva si hay hueco."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if self._idle:
+                    pooled = self._idle.pop()
+                    break
+                if self._total < self.size:
+                    self._total += 1
+                    pooled = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError("No hay conexiones MySQL libres en el pool.")
+                self._cond.wait(remaining)
+            self._in_use += 1
+
+        if pooled is not None and (time.monotonic() - pooled.last_used < PING_AFTER_IDLE or pooled.is_healthy()):
+            return pooled
+        if pooled is not None:
+            logging.info("Conexión MySQL caída, abriendo una nueva.")
+            pooled.close()
+
+        try:
+            return self._connect()
+        except Exception:
+            self._release_slot()
+            raise
+
+    def checkin(self, pooled, broken=False):
+        if broken:
+            pooled.close()
+            self._release_slot()
+            return
+        pooled.last_used = time.monotonic()
+        with self._cond:
+            self._in_use -= 1
+            self._idle.append(pooled)
+            self._cond.notify()
+
+    def _release_slot(self):
+        with self._cond:
+            self._total -= 1
+            self._in_use -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def cursor(self, readonly=False):
+        """Cursor de una conexión del pool dentro de una transacción, o en autocommit si `readonly`."""
+        pooled = self.checkout()
+        try:
+            if readonly:
+                yield pooled.cursor()
+            else:
+                pooled.conn.query('START TRANSACTION')
+                yield pooled.cursor()
+                pooled.conn.commit()
+        except MySQLdb.OperationalError:
+            self.checkin(pooled, broken=True)
+            raise
+        except BaseException:
+            if readonly:
+                self.checkin(pooled)
+                raise
+            try:
+                pooled.conn.rollback()
+            except Exception:
+                # Si ni siquiera se puede deshacer la transacción, la conexión no se reutiliza
+                self.checkin(pooled, broken=True)
+                raise
+            self.checkin(pooled)
+            raise
+        else:
+            self.checkin(pooled)
+
+    def close(self):
+        """Cierra todas las conexiones libres del pool."""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._total -= len(idle)
+        for pooled in idle:
+            pooled.close()
@@ -1,6 +1,3 @@
--- Seleccionar la base de datos
-USE avqdb;
-
 -- Desactivar la verificación de las claves foráneas temporalmente
 SET FOREIGN_KEY_CHECKS = 0;
 
@@ -21,6 +18,9 @@ TRUNCATE TABLE players;
 -- Tabla rounds
 TRUNCATE TABLE rounds;
 
+-- Tabla debt_summary
+TRUNCATE TABLE debt_summary;
+
 
 -- Reactivar la verificación de las claves foráneas
 SET FOREIGN_KEY_CHECKS = 1;
\ No newline at end of file
@@ -0,0 +1,175 @@
+"""Estáticos con huella de contenido para servirlos con caché permanente.
+
+`python -m misterassets` copia los estáticos a static/dist con el hash de su
+contenido en el nombre, guarda los ficheros de texto también comprimidos (.gz y
+.br), añade versiones AVIF/WebP de las imágenes PNG y escribe el manifiesto.
+Las plantillas piden los estáticos con `url_for('static', filename=...)`, que
+devuelve la ruta con huella si el estático está en el manifiesto y la original
+si no se ha ejecutado la compilación.
+"""
+import hashlib
+import io
+import json
+import logging
+import os
+import flask
+from PIL import Image
+from mistersnapshots import write_precompressed
+
+# Carpeta de los estáticos con huella, dentro de static/
+ASSETS_DIST = 'dist'
+# Manifiesto {ruta original: {'file': ruta con huella, 'variants': {tipo: ruta}}}
+ASSETS_MANIFEST = 'manifest.json'
+# Estáticos que se guardan también comprimidos
+COMPRESSIBLE = {'.css', '.js', '.json', '.svg', '.ico'}
+# Formatos alternativos de las imágenes PNG, del preferido al menos preferido
+IMAGE_VARIANTS = {'image/avif': ('.avif', 'AVIF'), 'image/webp': ('.webp', 'WEBP')}
+# Calidad de las versiones AVIF/WebP
+ASSETS_IMAGE_QUALITY = int(os.getenv('MISTER_ASSETS_IMAGE_QUALITY', 80))
+# Los estáticos con huella no cambian nunca: el navegador no tiene que revalidarlos
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+def fingerprint(body):
+    return hashlib.sha256(body).hexdigest()[:12]
+
+def _hashed(path, digest, ext=None):
+    root, original_ext = os.path.splitext(path)
+    return f"{root}.{digest}{ext or original_ext}"
+
+def _referenced(manifest):
+    paths = set()
+    for entry in manifest.values():
+        paths.add(entry['file'])
+        paths.update(entry.get('variants', {}).values())
+    return paths
+
+def load_manifest(static_folder):
+    try:
+        with open(os.path.join(static_folder, ASSETS_DIST, ASSETS_MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def _write(path, body, compress):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if compress:
+        write_precompressed(path, body)
+    else:
+        with open(path, 'wb') as f:
+            f.write(body)
+
+def _encode(body, fmt):
+    with Image.open(io.BytesIO(body)) as image:
+        output = io.BytesIO()
+        image.save(output, fmt, quality=ASSETS_IMAGE_QUALITY)
+    return output.getvalue()
+
+def build_assets(static_folder):
+    """Genera static/dist y su manifiesto, y devuelve el manifiesto.
+
+    Los nombres dependen del contenido del original, así que los estáticos que no
+    han cambiado no se vuelven a generar. Se borran los ficheros que no están en
+    el manifiesto nuevo ni en el anterior, al que aún pueden apuntar páginas
+    abiertas.
+    """
+    dist = os.path.join(static_folder, ASSETS_DIST)
+    previous = load_manifest(static_folder)
+    manifest = {}
+
+    for folder, dirs, files in os.walk(static_folder):
+        dirs[:] = sorted(d for d in dirs if os.path.join(folder, d) != dist)
+        for name in sorted(files):
+            if name.startswith('.'):
+                continue
+            path = os.path.join(folder, name)
+            filename = os.path.relpath(path, static_folder).replace(os.sep, '/')
+            ext = os.path.splitext(name)[1].lower()
+            with open(path, 'rb') as f:
+                body = f.read()
+            digest = fingerprint(body)
+
+            entry = {'file': _hashed(filename, digest)}
+            target = os.path.join(dist, entry['file'])
+            if not os.path.exists(target):
+                _write(target, body, ext in COMPRESSIBLE)
+
+            if ext == '.png':
+                entry['variants'] = {}
+                for mimetype, (variant_ext, fmt) in IMAGE_VARIANTS.items():
+                    variant = _hashed(filename, digest, variant_ext)
+                    if not os.path.exists(os.path.join(dist, variant)):
+                        try:
+                            _write(os.path.join(dist, variant), _encode(body, fmt), False)
+                        except (KeyError, OSError) as e:
+                            logging.warning(f"No se ha podido generar {variant} ({fmt} no disponible: {e})")
+                            continue
+                    entry['variants'][mimetype] = variant
+            manifest[filename] = entry
+
+    os.makedirs(dist, exist_ok=True)
+    tmp_path = os.path.join(dist, f".{ASSETS_MANIFEST}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, os.path.join(dist, ASSETS_MANIFEST))
+
+    keep = _referenced(manifest) | _referenced(previous)
+    for folder, dirs, files in os.walk(dist):
+        for name in files:
+            path = os.path.relpath(os.path.join(folder, name), dist).replace(os.sep, '/')
+            original = path[:-3] if path.endswith(('.gz', '.br')) else path
+            if not name.startswith('.') and path != ASSETS_MANIFEST and original not in keep:
+                os.remove(os.path.join(folder, name))
+
+    logging.info(f"Estáticos compilados en {dist} ({len(manifest)} ficheros).")
+    return manifest
+
+class AssetManifest:
+    """Manifiesto de static/dist, que se vuelve a leer cuando cambia en disco."""
+
+    def __init__(self, static_folder):
+        self.static_folder = static_folder
+        self.path = os.path.join(static_folder, ASSETS_DIST, ASSETS_MANIFEST)
+        self._state = (None, {})
+
+    def get(self, filename):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime != self._state[0]:
+            self._state = (mtime, load_manifest(self.static_folder) if mtime else {})
+        return self._state[1].get(filename)
+
+def init_app(app):
+    """Cambia `url_for` en las plantillas para que los estáticos usen la ruta con huella."""
+    manifest = AssetManifest(app.static_folder)
+
+    def url_for(endpoint, **values):
+        entry = manifest.get(values.get('filename')) if endpoint == 'static' else None
+        if entry:
+            values['filename'] = f"{ASSETS_DIST}/{entry['file']}"
+        return flask.url_for(endpoint, **values)
+
+    def static_variants(filename):
+        """[(tipo, url)] de las versiones alternativas de una imagen, de la preferida a la menos."""
+        entry = manifest.get(filename) or {}
+        return [
+            (mimetype, flask.url_for('static', filename=f"{ASSETS_DIST}/{path}"))
+            for mimetype, path in entry.get('variants', {}).items()
+        ]
+
+    @app.context_processor
+    def assets():
+        return {'url_for': url_for, 'static_variants': static_variants}
+
+    @app.after_request
+    def immutable_assets(response):
+        filename = (flask.request.view_args or {}).get('filename', '')
+        if (flask.request.endpoint == 'static' and filename.startswith(f"{ASSETS_DIST}/")
+                and filename != f"{ASSETS_DIST}/{ASSETS_MANIFEST}" and response.status_code < 400):
+            response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+if __name__ == '__main__':
+    logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO').upper(), format='%(asctime)s - %(levelname)s - %(message)s')
+    build_assets(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static'))
@@ -0,0 +1,148 @@
+import fcntl
+import gzip
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from functools import wraps
+from flask import request, make_response
+
+# Respuestas guardadas como máximo por proceso
+CACHE_MAX_ENTRIES = int(os.getenv('MISTER_CACHE_MAX_ENTRIES', 256))
+# Fichero con la versión de los datos compartida por todos los workers; vacío para
+# usar un contador propio de cada proceso
+CACHE_VERSION_FILE = os.getenv('MISTER_CACHE_VERSION_FILE', '/tmp/mister-data-version')
+# Las respuestas más pequeñas se envían sin comprimir (bytes)
+COMPRESS_MIN_SIZE = int(os.getenv('MISTER_COMPRESS_MIN_SIZE', 1024))
+
+class DataVersion:
+    """Contador de versión de los datos que se incrementa en cada actualización."""
+
+    def __init__(self, path=CACHE_VERSION_FILE):
+        self.path = path
+        self._local = 0
+
+    def current(self):
+        if not self.path:
+            return self._local
+        try:
+            with open(self.path) as f:
+                return int(f.read() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def bump(self):
+        if not self.path:
+            self._local += 1
+            return self._local
+
+        with open(self.path, 'a+') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            f.seek(0)
+            try:
+                version = int(f.read() or 0) + 1
+            except ValueError:
+                version = 1
+            f.seek(0)
+            f.truncate()
+            f.write(str(version))
+            f.flush()
+        return version
+
+class CachedResponse:
+    def __init__(self, body, mimetype):
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+        self._gzip_body = None
+
+    @property
+    def gzip_body(self):
+        """Cuerpo comprimido con gzip, que se calcula la primera vez que se pide."""
+        if self._gzip_body is None:
+            self._gzip_body = gzip.compress(self.body, mtime=0)
+        return self._gzip_body
+
+class ResponseCache:
+    """Caché LRU de respuestas de la API, invalidada por la versión de los datos.
+
+    La clave incluye el endpoint, sus parámetros y la versión actual, así que al
+    incrementar la versión todas las entradas anteriores dejan de usarse y acaban
+    saliendo del LRU.
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, version=None):
+        self.max_entries = max_entries
+        self.version = version or DataVersion()
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self):
+        """Marca los datos como modificados en todos los workers."""
+        version = self.version.bump()
+        with self._lock:
+            self._entries.clear()
+        logging.info(f"Caché de la API invalidada (versión de datos {version}).")
+
+    def entry(self, endpoint, view, *args, **kwargs):
+        """Entrada de `endpoint` para los parámetros de la petición actual.
+
+        Si no está en la caché se genera con `view`; si la vista no responde un 200
+        se devuelve su respuesta sin guardarla.
+        """
+        key = (endpoint, tuple(sorted(request.args.items())), self.version.current())
+        entry = self.get(key)
+        if entry is None:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            entry = CachedResponse(response.get_data(), response.mimetype)
+            self.put(key, entry)
+        return entry
+
+    def cached(self, view):
+        """Decorador que cachea las respuestas 200 de una vista y responde con ETag/304.
+
+        Si el cliente acepta gzip, las respuestas a partir de COMPRESS_MIN_SIZE se
+        envían comprimidas; el cuerpo comprimido también queda en la caché.
+        """
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            entry = self.entry(request.endpoint, view, *args, **kwargs)
+            if not isinstance(entry, CachedResponse):
+                return entry
+
+            response = make_response(entry.body)
+            response.mimetype = entry.mimetype
+            response.vary.add('Accept-Encoding')
+            if len(entry.body) >= COMPRESS_MIN_SIZE and 'gzip' in request.accept_encodings:
+                response.set_data(entry.gzip_body)
+                response.headers['Content-Encoding'] = 'gzip'
+                response.set_etag(f"{entry.etag}-gzip")
+            else:
+                response.set_etag(entry.etag)
+            # El navegador debe revalidar siempre, pero con el ETag basta un 304
+            response.headers['Cache-Control'] = 'no-cache'
+            return response.make_conditional(request)
+
+        return wrapper
@@ -0,0 +1,73 @@
+import json
+import logging
+import os
+import time
+
+# Fichero con el progreso del último scraping de jornadas
+CHECKPOINT_FILE = os.getenv('MISTER_CHECKPOINT_FILE', os.path.join('logs', 'scrape_checkpoint.json'))
+# Segundos durante los que un scraping fallido se puede reanudar
+CHECKPOINT_MAX_AGE = int(os.getenv('MISTER_CHECKPOINT_MAX_AGE', 3600))
+
+def checkpoint_path(account='MISTER'):
+    """Fichero de checkpoint de una cuenta de Mister; la cuenta por defecto usa CHECKPOINT_FILE."""
+    if account == 'MISTER':
+        return CHECKPOINT_FILE
+    root, ext = os.path.splitext(CHECKPOINT_FILE)
+    return f"{root}_{account.lower()}{ext}"
+
+class Checkpoint:
+    """Progreso de un scraping de jornadas guardado en disco.
+
+    Registra los códigos de jornada ya cargados junto con sus puntos. Si el
+    scraping falla, el siguiente reutiliza esas jornadas en lugar de volver a
+    cargarlas, siempre que el checkpoint sea reciente y los códigos coincidan.
+    Quien lo usa no debe reutilizar la última jornada, que sigue abierta.
+    """
+
+    def __init__(self, path, codes, rounds=None, started_at=None):
+        self.path = path
+        self.codes = codes
+        self.rounds = rounds or {}
+        self.started_at = started_at or time.time()
+
+    @classmethod
+    def resume(cls, codes, path=CHECKPOINT_FILE):
+        """Retoma el checkpoint de un scraping fallido o empieza uno nuevo."""
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(path, codes)
+
+        age = time.time() - data.get('started_at', 0)
+        if data.get('codes') != codes or age > CHECKPOINT_MAX_AGE:
+            return cls(path, codes)
+
+        rounds = {int(num): entry for num, entry in data.get('rounds', {}).items()}
+        logging.info(f"Reanudando scraping con {len(rounds)} jornadas ya cargadas: {sorted(rounds)}")
+        return cls(path, codes, rounds, data['started_at'])
+
+    def fetched(self, num, code):
+        """Puntos guardados de una jornada, o None si no se había cargado."""
+        entry = self.rounds.get(num)
+        if entry and entry['code'] == code:
+            return entry['points']
+        return None
+
+    def record(self, num, code, points):
+        self.rounds[num] = {'code': code, 'points': points}
+        self._save()
+
+    def finish(self):
+        """El scraping ha terminado bien: ya no hay nada que reanudar."""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'codes': self.codes, 'started_at': self.started_at, 'rounds': self.rounds}, f)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,242 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from functools import lru_cache
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+from mistermetrics import phase
+
+# chromedriver fijado al construir la imagen (ver Dockerfile)
+CHROMEDRIVER_PATH = os.getenv('CHROMEDRIVER_PATH', '/usr/local/bin/chromedriver')
+# Sesiones de Chrome abiertas como máximo por proceso: al menos una por hilo de
+# carga de jornadas más la sesión principal del scraping
+POOL_SIZE = max(int(os.getenv('MISTER_DRIVER_POOL_SIZE', 2)), int(os.getenv('MISTER_SCRAPE_WORKERS', 1)) + 1)
+# Tiempo máximo (s) de carga de una página antes de abortar y reintentar la jornada
+PAGE_LOAD_TIMEOUT = int(os.getenv('MISTER_PAGE_LOAD_TIMEOUT', 30))
+# Usos tras los que se recicla una sesión
+MAX_USES = int(os.getenv('MISTER_DRIVER_MAX_USES', 20))
+# Memoria (MB) de Chrome y sus procesos hijos a partir de la que se recicla una sesión
+MAX_RSS_MB = int(os.getenv('MISTER_DRIVER_MAX_RSS_MB', 1024))
+# Perfil del navegador: 'fast' (carga ligera) o 'full' (carga la página completa)
+BROWSER_PROFILE = os.getenv('MISTER_BROWSER_PROFILE', 'fast')
+# Recursos que el perfil 'fast' no descarga: imágenes, multimedia, fuentes y terceros
+BLOCKED_URLS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico',
+    '*.mp4', '*.webm', '*.mp3', '*.woff', '*.woff2', '*.ttf',
+    '*doubleclick.net*', '*googlesyndication.com*', '*googletagmanager.com*',
+    '*google-analytics.com*', '*facebook.net*', '*amazon-adsystem.com*',
+    '*adnxs.com*', '*criteo.*', '*taboola.com*', '*outbrain.com*', '*didomi.io*',
+]
+# Segundos de espera por una sesión libre cuando el pool está lleno
+CHECKOUT_TIMEOUT = int(os.getenv('MISTER_DRIVER_CHECKOUT_TIMEOUT', 300))
+
+@lru_cache(maxsize=1)
+def chromedriver_path():
+    """Ruta del chromedriver: el binario fijado en la imagen o, si no existe, el de webdriver-manager."""
+    if os.path.exists(CHROMEDRIVER_PATH):
+        return CHROMEDRIVER_PATH
+    logging.warning(f"No existe {CHROMEDRIVER_PATH}, descargando chromedriver con webdriver-manager.")
+    return ChromeDriverManager().install()
+
+def build_options():
+    """Opciones de Chrome para el scraping."""
+    options = webdriver.ChromeOptions()
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--headless')
+    if BROWSER_PROFILE == 'fast':
+        # No esperar a imágenes ni subrecursos: basta con el DOM para leer los standings
+        options.page_load_strategy = 'eager'
+        options.add_argument('--blink-settings=imagesEnabled=false')
+        options.add_argument('--mute-audio')
+        options.add_experimental_option('prefs', {
+            'profile.managed_default_content_settings.images': 2,
+            'profile.managed_default_content_settings.media_stream': 2,
+        })
+    return options
+
+def start_driver():
+    """Arranca un Chrome headless nuevo."""
+    service = Service(chromedriver_path())
+    driver = webdriver.Chrome(service=service, options=build_options())
+    driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+    if BROWSER_PROFILE == 'fast':
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URLS})
+    return driver
+
+def _children(pid):
+    children = []
+    task_dir = f'/proc/{pid}/task'
+    try:
+        for tid in os.listdir(task_dir):
+            with open(os.path.join(task_dir, tid, 'children')) as f:
+                children.extend(int(child) for child in f.read().split())
+    except OSError:
+        pass
+    return children
+
+def _rss(pid):
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+def process_tree_rss(pid):
+    """Memoria residente (bytes) de un proceso y todos sus descendientes, leída de /proc."""
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        total += _rss(current)
+        pending.extend(_children(current))
+    return total
+
+class PooledDriver:
+    """Sesión de Chrome ya autenticada que vive en el pool."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.uses = 0
+        self.created = time.monotonic()
+
+    def rss(self):
+        process = getattr(self.driver.service, 'process', None)
+        return process_tree_rss(process.pid) if process else 0
+
+    def is_healthy(self):
+        """Comprueba que el navegador responde y que la sesión sigue iniciada."""
+        try:
+            url = self.driver.current_url
+        except Exception:
+            return False
+        return 'sign-in' not in url and 'onboarding' not in url
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception as e:
+            logging.warning(f"Error al cerrar Chrome: {e}")
+
+class DriverPool:
+    """Pool de sesiones de Chrome calientes y autenticadas.
+
+    Las sesiones se comprueban al sacarlas del pool y se reciclan tras `max_uses`
+    usos o cuando Chrome supera `max_rss_mb`, de modo que las fugas de memoria
+    quedan acotadas y el arranque y el login se pagan una vez por proceso.
+    """
+
+    def __init__(self, login, size=POOL_SIZE, max_uses=MAX_USES, max_rss_mb=MAX_RSS_MB):
+        self.login = login
+        self.size = size
+        self.max_uses = max_uses
+        self.max_rss = max_rss_mb * 1024 * 1024
+        self._idle = []
+        self._live = set()
+        self._total = 0
+        self._cond = threading.Condition()
+
+    def _create(self):
+        with phase('driver_startup'):
+            driver = start_driver()
+        try:
+            with phase('login'):
+                self.login(driver)
+        except Exception:
+            driver.quit()
+            raise
+        logging.info("Nueva sesión de Chrome añadida al pool.")
+        pooled = PooledDriver(driver)
+        self._live.add(pooled)
+        return pooled
+
+    def _quit(self, pooled):
+        self._live.discard(pooled)
+        pooled.quit()
+
+    def rss(self):
+        """Memoria residente de todas las sesiones abiertas del pool."""
+        return sum(pooled.rss() for pooled in list(self._live))
+
+    def checkout(self, timeout=CHECKOUT_TIMEOUT):
+        """Saca una sesión sana del pool, creando una nueva si hay hueco."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if self._idle:
+                    pooled = self._idle.pop()
+                    break
+                if self._total < self.size:
+                    self._total += 1
+                    pooled = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError("No hay sesiones de Chrome libres en el pool.")
+                self._cond.wait(remaining)
+
+        if pooled is not None and pooled.is_healthy():
+            return pooled
+        if pooled is not None:
+            logging.info("Sesión de Chrome no válida, reemplazándola.")
+            self._quit(pooled)
+
+        try:
+            return self._create()
+        except Exception:
+            self._discard_slot()
+            raise
+
+    def checkin(self, pooled):
+        """Devuelve una sesión al pool o la recicla si ha agotado sus usos o su memoria."""
+        pooled.uses += 1
+        rss = pooled.rss()
+        if pooled.uses >= self.max_uses or rss > self.max_rss:
+            logging.info(f"Reciclando sesión de Chrome ({pooled.uses} usos, {rss // (1024 * 1024)} MB).")
+            self._quit(pooled)
+            self._discard_slot()
+            return
+
+        with self._cond:
+            self._idle.append(pooled)
+            self._cond.notify()
+
+    def _discard_slot(self):
+        with self._cond:
+            self._total -= 1
+            self._cond.notify()
+
+    def close(self):
+        """Cierra todas las sesiones libres del pool."""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._total -= len(idle)
+        for pooled in idle:
+            self._quit(pooled)
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_pool(key, login):
+    """Pool del proceso para unas credenciales concretas."""
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = DriverPool(login)
+        return pool
+
+def chrome_rss():
+    """Memoria residente de todas las sesiones de Chrome del proceso."""
+    return sum(pool.rss() for pool in list(_pools.values()))
+
+@atexit.register
+def close_pools():
+    for pool in list(_pools.values()):
+        pool.close()
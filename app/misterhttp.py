@@ -0,0 +1,104 @@
+import logging
+import os
+import threading
+import time
+import requests
+from misterparser import parse_user_list, parse_jornada_codes, parse_jornada_points
+from mistermetrics import phase
+
+MISTER_BASE_URL = os.getenv('MISTER_BASE_URL', 'https://mister.mundodeportivo.com')
+MISTER_LOGIN_PATH = os.getenv('MISTER_LOGIN_PATH', '/new-onboarding/auth/email/sign-in')
+REQUEST_TIMEOUT = 20
+
+# Segundos durante los que se confía en la sesión guardada sin volver a comprobarla
+SESSION_CHECK_INTERVAL = 300
+
+# Cookies de la última sesión iniciada de cada cuenta y cuándo se comprobaron,
+# compartidas por todas las instancias del proceso: {email: (cookies, comprobada)}
+_sessions = {}
+_session_lock = threading.Lock()
+
+class LoginError(Exception):
+    pass
+
+class HttpBackend:
+    """Backend de scraping sin navegador: descarga las páginas con una sesión HTTP."""
+    name = 'http'
+
+    def __init__(self, email, password, base_url=None):
+        self.email = email
+        self.password = password
+        self.base_url = (base_url or MISTER_BASE_URL).rstrip('/')
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko)'
+
+    def __enter__(self):
+        # La sesión ya la abre open_backend(); el bloque with solo garantiza el cierre
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _url(self, path):
+        return f"{self.base_url}{path}"
+
+    def _is_logged_in(self):
+        response = self.session.get(self._url('/feed'), timeout=REQUEST_TIMEOUT)
+        return response.ok and '/feed' in response.url
+
+    def open(self):
+        """Inicia sesión una sola vez por proceso y cuenta, y reutiliza las cookies en las siguientes."""
+        with _session_lock:
+            if self.email in _sessions:
+                cookies, checked_at = _sessions[self.email]
+                self.session.cookies.update(cookies)
+                if time.monotonic() - checked_at < SESSION_CHECK_INTERVAL:
+                    return
+                if self._is_logged_in():
+                    _sessions[self.email] = (cookies, time.monotonic())
+                    return
+                logging.info("La sesión HTTP guardada ha caducado, iniciando sesión de nuevo.")
+
+            with phase('login'):
+                response = self.session.post(
+                    self._url(MISTER_LOGIN_PATH),
+                    data={'email': self.email, 'password': self.password},
+                    timeout=REQUEST_TIMEOUT,
+                )
+                response.raise_for_status()
+                if not self._is_logged_in():
+                    raise LoginError("No se ha podido iniciar sesión por HTTP.")
+
+            _sessions[self.email] = (self.session.cookies.copy(), time.monotonic())
+            logging.info("Inicio de sesión HTTP exitoso.")
+
+    def close(self):
+        self.session.close()
+
+    def capture(self, step_name):
+        """Sin navegador no hay capturas de pantalla; solo se deja constancia en el log."""
+        logging.info(f"Paso sin captura (backend HTTP): {step_name}")
+
+    def _standings(self, code=None):
+        params = {'gw': code} if code is not None else None
+        response = self.session.get(self._url('/standings'), params=params, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        return response.text
+
+    def get_user_list(self):
+        with phase('standings'):
+            html = self._standings()
+        with phase('parse'):
+            return parse_user_list(html)
+
+    def get_jornada_codes(self):
+        with phase('standings'):
+            html = self._standings()
+        with phase('parse'):
+            return parse_jornada_codes(html)
+
+    def get_jornada_points(self, code):
+        with phase('load_round'):
+            html = self._standings(code)
+        with phase('parse'):
+            return parse_jornada_points(html)
@@ -0,0 +1,154 @@
+import hashlib
+import io
+import logging
+import os
+import re
+import time
+import requests
+from flask import abort, send_file
+from PIL import Image, ImageOps
+from misterassets import IMMUTABLE_CACHE_CONTROL
+
+# Carpeta de las miniaturas de los avatares; vacía para enlazar los originales
+IMAGE_DIR = os.getenv('MISTER_IMAGE_DIR', 'imagecache')
+# Lado de las miniaturas (px): 40 px en mister.css, al doble para pantallas de alta densidad
+THUMBNAIL_SIZE = int(os.getenv('MISTER_THUMBNAIL_SIZE', 80))
+THUMBNAIL_QUALITY = int(os.getenv('MISTER_THUMBNAIL_QUALITY', 80))
+# Espera máxima por cada avatar (s)
+IMAGE_FETCH_TIMEOUT = float(os.getenv('MISTER_IMAGE_FETCH_TIMEOUT', 10))
+# Las miniaturas que ya no usa ningún jugador se borran pasado este tiempo (s) o,
+# de la más antigua a la más reciente, si la carpeta supera IMAGE_CACHE_MAX_MB
+IMAGE_UNUSED_MAX_AGE = int(os.getenv('MISTER_IMAGE_UNUSED_MAX_AGE', 24 * 3600))
+IMAGE_CACHE_MAX_MB = int(os.getenv('MISTER_IMAGE_CACHE_MAX_MB', 50))
+# Ruta local de las miniaturas: /img/<hash>
+IMAGE_URL_PREFIX = '/img/'
+
+KEY_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+def make_thumbnail(body, size=THUMBNAIL_SIZE, quality=THUMBNAIL_QUALITY):
+    """Recorta la imagen al cuadrado central, la reduce a `size` px y la guarda en WebP."""
+    with Image.open(io.BytesIO(body)) as image:
+        image = ImageOps.fit(image.convert('RGBA'), (size, size), Image.LANCZOS)
+    out = io.BytesIO()
+    image.save(out, format='WEBP', quality=quality)
+    return out.getvalue()
+
+def _write_atomic(path, body):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(body)
+    os.replace(tmp_path, path)
+
+class ImageStore:
+    """Caché en disco de las miniaturas de los avatares, indexada por su contenido.
+
+    Cada avatar se descarga una sola vez: `sources/` guarda qué miniatura salió de
+    cada URL. La web enlaza las miniaturas como /img/<hash>, que no cambian nunca.
+    """
+
+    def __init__(self, root=IMAGE_DIR, size=THUMBNAIL_SIZE):
+        self.root = root
+        self.size = size
+        self.session = requests.Session()
+
+    @property
+    def enabled(self):
+        return bool(self.root)
+
+    def path(self, key):
+        return os.path.join(self.root, f"{key}.webp")
+
+    def _source_path(self, url):
+        return os.path.join(self.root, 'sources', hashlib.sha256(url.encode()).hexdigest()[:32])
+
+    def thumbnail(self, url):
+        """Devuelve el hash de la miniatura de `url`, descargando la imagen si no está en la caché."""
+        source = self._source_path(url)
+        try:
+            with open(source) as f:
+                key = f.read().strip()
+            if os.path.exists(self.path(key)):
+                return key
+        except FileNotFoundError:
+            pass
+
+        response = self.session.get(url, timeout=IMAGE_FETCH_TIMEOUT)
+        response.raise_for_status()
+        body = make_thumbnail(response.content, self.size)
+        key = hashlib.sha256(body).hexdigest()[:32]
+        if not os.path.exists(self.path(key)):
+            _write_atomic(self.path(key), body)
+        _write_atomic(source, key.encode())
+        return key
+
+    def localize(self, players):
+        """Cambia el avatar de cada jugador por su miniatura local; si no se puede descargar deja la URL original."""
+        if not self.enabled:
+            return players
+        for player in players:
+            url = player.get('profile_image')
+            if not url or url.startswith(IMAGE_URL_PREFIX):
+                continue
+            try:
+                player['profile_image'] = IMAGE_URL_PREFIX + self.thumbnail(url)
+            except (requests.RequestException, OSError) as e:
+                logging.warning(f"No se ha podido guardar el avatar de {player.get('username')}: {e}")
+        return players
+
+    def prune(self, images):
+        """Borra las miniaturas que no aparecen en `images` (las URLs guardadas de los jugadores)."""
+        if not self.enabled or not os.path.isdir(self.root):
+            return
+        used = {image[len(IMAGE_URL_PREFIX):] for image in images if image and image.startswith(IMAGE_URL_PREFIX)}
+
+        now = time.time()
+        unused = []
+        total = 0
+        for entry in os.scandir(self.root):
+            if not entry.is_file() or not entry.name.endswith('.webp'):
+                continue
+            stat = entry.stat()
+            total += stat.st_size
+            if entry.name[:-len('.webp')] in used:
+                # La fecha de modificación marca el último uso
+                os.utime(entry.path)
+            else:
+                unused.append((stat.st_mtime, stat.st_size, entry.path))
+        unused.sort()
+
+        removed = 0
+        for mtime, size, path in unused:
+            if now - mtime <= IMAGE_UNUSED_MAX_AGE and total <= IMAGE_CACHE_MAX_MB * 1024 * 1024:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+
+        # Las URLs cuya miniatura ya no existe se vuelven a descargar si se necesitan
+        sources = os.path.join(self.root, 'sources')
+        if removed and os.path.isdir(sources):
+            for entry in os.scandir(sources):
+                with open(entry.path) as f:
+                    key = f.read().strip()
+                if not os.path.exists(self.path(key)):
+                    os.remove(entry.path)
+        if removed:
+            logging.info(f"Eliminadas {removed} miniaturas sin usar de {self.root}")
+
+IMAGES = ImageStore()
+
+def init_app(app, store=IMAGES):
+    """Sirve las miniaturas en /img/<hash> con caché permanente."""
+
+    @app.route(f"{IMAGE_URL_PREFIX}<key>")
+    def image(key):
+        path = os.path.abspath(store.path(key))
+        if not store.enabled or not KEY_PATTERN.match(key) or not os.path.exists(path):
+            abort(404)
+        response = send_file(path, mimetype='image/webp', etag=key)
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        return response
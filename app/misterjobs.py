@@ -0,0 +1,106 @@
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+# Trabajos terminados que se conservan para consultar su estado
+MAX_FINISHED_JOBS = 100
+
+class Job:
+    """Trabajo en segundo plano con su estado y progreso."""
+
+    def __init__(self, kind):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = 'queued'
+        self.progress = {}
+        self.message = None
+        self.created_at = datetime.now(timezone.utc)
+        self.finished_at = None
+        self.revision = 0
+        self._changed = threading.Condition()
+
+    @property
+    def active(self):
+        return self.status in ('queued', 'running')
+
+    def update(self, **progress):
+        """Actualiza el progreso del trabajo (p. ej. jornadas cargadas)."""
+        self.progress.update(progress)
+        self.touch()
+
+    def touch(self):
+        """Avisa a quien espere cambios del trabajo."""
+        with self._changed:
+            self.revision += 1
+            self._changed.notify_all()
+
+    def wait_for_change(self, revision, timeout=None):
+        """Espera a que el trabajo cambie respecto a `revision` y devuelve la revisión actual."""
+        with self._changed:
+            self._changed.wait_for(lambda: self.revision != revision, timeout)
+            return self.revision
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'progress': self.progress,
+            'message': self.message,
+            'created_at': self.created_at.isoformat(),
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+class JobManager:
+    """Cola de trabajos en proceso que ejecuta como mucho `workers` scrapings a la vez.
+
+    Mientras haya un trabajo del mismo tipo en cola o en ejecución, las nuevas
+    peticiones reciben ese mismo trabajo en lugar de lanzar otro scraping.
+    """
+
+    def __init__(self, app, workers=1):
+        self.app = app
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job')
+
+    def submit(self, kind, target, *args, **kwargs):
+        """Encola `target(job, *args, **kwargs)` y devuelve el trabajo, nuevo o ya activo."""
+        with self._lock:
+            for job in self._jobs.values():
+                if job.kind == kind and job.active:
+                    return job
+
+            job = Job(kind)
+            self._jobs[job.id] = job
+            self._prune()
+
+        self._executor.submit(self._run, job, target, args, kwargs)
+        return job
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def _run(self, job, target, args, kwargs):
+        job.status = 'running'
+        job.touch()
+        status = 'failed'
+        try:
+            with self.app.app_context():
+                job.message = target(job, *args, **kwargs)
+            status = 'done'
+        except Exception as e:
+            logging.error(f"Error en el trabajo {job.kind} {job.id}: {e}", exc_info=True)
+            job.message = str(e)
+        finally:
+            job.finished_at = datetime.now(timezone.utc)
+            job.status = status
+            job.touch()
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if not job.active]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
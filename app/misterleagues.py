@@ -0,0 +1,197 @@
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from misterscrapper import get_player_list, iter_jornada_points
+from db.mister.misterpool import MySQLPool
+from misterimages import IMAGES
+from misterdriver import chrome_rss
+import mistermetrics
+from db.mister.misterdb import upsert_round, upsert_player, get_player_images, get_closed_rounds, calcular_y_actualizar_deudas
+
+# Procesos que ejecutan los scrapings de las ligas; 0 para ejecutarlos en el propio proceso web
+LEAGUE_WORKERS = int(os.getenv('MISTER_LEAGUE_WORKERS', 2))
+
+def refresh_points(db, league, progress, invalidate, full=False):
+    """Actualiza los puntos de las jornadas de una liga.
+
+    Cada jornada se guarda en cuanto se lee, así que un fallo a mitad del scraping
+    conserva las jornadas anteriores y la web las muestra mientras avanza. Solo
+    se invalidan los datos y se recalculan las deudas de las jornadas que han
+    cambiado en la base de datos. El `digest` de los puntos leídos le dice al
+    planificador si algo ha cambiado.
+    """
+    league_id = league['id']
+    closed_rounds = set() if full else get_closed_rounds(db, league_id)
+    on_plan = lambda nums: progress(rounds_total=len(nums), rounds_scraped=0)
+    digest = hashlib.sha256()
+    scraped = 0
+    changed = []
+    try:
+        for num, points in iter_jornada_points(closed_rounds, full=full, on_plan=on_plan, account=league['credentials_env']):
+            scraped += 1
+            if upsert_round(db, num, points, league_id):
+                changed.append(num)
+                invalidate()
+            digest.update(json.dumps([num, points], sort_keys=True).encode())
+            progress(rounds_scraped=scraped, last_round=num, digest=digest.hexdigest())
+    finally:
+        if changed:
+            calcular_y_actualizar_deudas(db, league_id, nums=changed)
+            invalidate()
+    return "OK"
+
+def refresh_players(db, league, progress, invalidate):
+    """Actualiza la lista de jugadores de una liga.
+
+    Los avatares se guardan como miniaturas locales (misterimages) antes de
+    escribir los jugadores, y después se borran las que ya no usa nadie.
+    """
+    success, players = get_player_list(league['credentials_env'])
+    if not success:
+        raise RuntimeError("Error updating player list")
+
+    progress(players=len(players))
+    IMAGES.localize(players)
+    if not upsert_player(db, players, league['id']):
+        raise RuntimeError("Error inserting/updating players")
+    invalidate()
+
+    try:
+        IMAGES.prune(get_player_images(db))
+    except Exception as e:
+        logging.warning(f"No se han podido limpiar las miniaturas: {e}")
+    return "OK"
+
+TASKS = {task.__name__: task for task in (refresh_points, refresh_players)}
+
+# Pool de conexiones propio de cada proceso worker
+_worker_db = None
+
+def _run_task(name, league, kwargs, events):
+    """Ejecuta una tarea en un proceso worker, enviando su progreso por la cola `events`."""
+    global _worker_db
+    if _worker_db is None:
+        _worker_db = MySQLPool(
+            size=1,
+            host=os.getenv('MYSQL_HOST', 'db'),
+            user=os.getenv('MYSQL_USER'),
+            passwd=os.getenv('MYSQL_PASSWORD'),
+            db=os.getenv('MYSQL_DATABASE'),
+            charset='utf8mb4',
+        )
+    # En la cola, None indica que los datos han cambiado y una tupla es una métrica
+    mistermetrics.forward_to(events.put)
+    try:
+        return TASKS[name](
+            _worker_db, league,
+            progress=lambda **fields: events.put(fields),
+            invalidate=lambda: events.put(None),
+            **kwargs,
+        )
+    finally:
+        mistermetrics.report_chrome_rss(chrome_rss())
+        mistermetrics.forward_to(None)
+
+class LeagueWorkers:
+    """Ejecuta las actualizaciones de las ligas en un pool acotado de procesos.
+
+    Cada liga tiene como mucho un trabajo de cada tipo en cola (JobManager los
+    deduplica), así que la cola FIFO reparte los procesos por turnos entre las
+    ligas. Los trabajos de una misma liga (puntos y jugadores) se ejecutan de uno
+    en uno: comparten la cuenta de Mister y el recálculo de deudas. El progreso de
+    cada tarea vuelve por una cola y se copia en su trabajo, y sus métricas se
+    registran en este proceso, que es el que sirve /metrics. Cuando cambian los
+    datos de una liga se llama a `on_change(league)`.
+    """
+
+    def __init__(self, db, on_change, processes=LEAGUE_WORKERS):
+        self.db = db
+        self.on_change = on_change
+        self.processes = processes
+        self._executor = None
+        self._manager = None
+        self._lock = threading.Lock()
+        self._league_locks = {}
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn: los procesos no heredan los hilos ni las conexiones del proceso web
+                context = multiprocessing.get_context('spawn')
+                self._manager = context.Manager()
+                self._executor = ProcessPoolExecutor(max_workers=self.processes, mp_context=context)
+                logging.info(f"Pool de {self.processes} procesos para las ligas iniciado.")
+            return self._executor, self._manager
+
+    def _league_lock(self, league):
+        with self._lock:
+            return self._league_locks.setdefault(league['slug'], threading.Lock())
+
+    def run(self, job, task, league, **kwargs):
+        """Ejecuta `task` para la liga y devuelve su resultado, actualizando el progreso de `job`.
+
+        Si la liga ya tiene otra tarea en marcha, espera a que termine.
+        """
+        with self._league_lock(league):
+            return self._run(job, task, league, **kwargs)
+
+    def _run(self, job, task, league, **kwargs):
+        if self.processes <= 0:
+            return task(self.db, league, progress=job.update, invalidate=lambda: self.on_change(league), **kwargs)
+
+        executor, manager = self._pool()
+        try:
+            events = manager.Queue()
+            future = executor.submit(_run_task, task.__name__, league, kwargs, events)
+            while True:
+                try:
+                    self._apply(job, league, events.get(timeout=1))
+                except queue.Empty:
+                    if future.done():
+                        break
+            while True:
+                try:
+                    self._apply(job, league, events.get_nowait())
+                except queue.Empty:
+                    break
+            return future.result()
+        except BrokenProcessPool:
+            # Un worker ha muerto (p. ej. Chrome sin memoria) y el pool ya no acepta
+            # tareas: el trabajo falla y el siguiente crea un pool nuevo
+            logging.error("Un proceso del pool de ligas ha terminado de forma inesperada; se reiniciará el pool.")
+            self._discard(executor)
+            mistermetrics.forget_workers()
+            raise
+
+    def _apply(self, job, league, event):
+        if event is None:
+            self.on_change(league)
+        elif isinstance(event, tuple):
+            mistermetrics.record(event)
+        else:
+            job.update(**event)
+
+    def _discard(self, executor):
+        with self._lock:
+            # Otro trabajo puede haberlo sustituido ya
+            if self._executor is not executor:
+                return
+            manager = self._manager
+            self._executor = None
+            self._manager = None
+        executor.shutdown(wait=False, cancel_futures=True)
+        manager.shutdown()
+
+    def close(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._manager.shutdown()
+                self._executor = None
+                self._manager = None
@@ -0,0 +1,141 @@
+import json
+import logging
+import os
+import random
+import time
+from contextlib import contextmanager
+from functools import wraps
+from flask import Response, g, request
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily
+
+# Fracción de los payloads del scraper que se registran en el log (solo en DEBUG)
+PAYLOAD_LOG_SAMPLE = float(os.getenv('MISTER_PAYLOAD_LOG_SAMPLE', 0.1))
+
+REQUEST_LATENCY = Histogram(
+    'mister_http_request_duration_seconds', 'Latencia de las peticiones HTTP por ruta',
+    ['route', 'method', 'status'],
+)
+DB_QUERY_LATENCY = Histogram(
+    'mister_db_query_duration_seconds', 'Duración de las operaciones de misterdb',
+    ['query'],
+)
+SCRAPER_PHASE_LATENCY = Histogram(
+    'mister_scraper_phase_duration_seconds', 'Duración de cada fase del scraping',
+    ['phase'], buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300),
+)
+# Histogramas que los procesos worker envían al proceso web con `forward_to`
+HISTOGRAMS = {'db_query': DB_QUERY_LATENCY, 'scraper_phase': SCRAPER_PHASE_LATENCY}
+CHROME_RSS = Gauge('mister_chrome_rss_bytes', 'Memoria residente de las sesiones de Chrome del proceso')
+DB_POOL_IN_USE = Gauge('mister_db_pool_connections_in_use', 'Conexiones MySQL prestadas del pool')
+DB_POOL_SIZE = Gauge('mister_db_pool_size', 'Tamaño máximo del pool de conexiones MySQL')
+
+class CacheCollector:
+    """Aciertos y fallos de la caché de la API como contadores (mister_cache_*_total).
+
+    Se leen de la caché en cada consulta de /metrics; la proporción se calcula en
+    Prometheus con rate() sobre los dos contadores.
+    """
+
+    def __init__(self):
+        self.cache = None
+
+    def collect(self):
+        if self.cache is None:
+            return
+        yield CounterMetricFamily('mister_cache_hits', 'Aciertos de la caché de la API', value=self.cache.hits)
+        yield CounterMetricFamily('mister_cache_misses', 'Fallos de la caché de la API', value=self.cache.misses)
+
+CACHE_COUNTERS = CacheCollector()
+REGISTRY.register(CACHE_COUNTERS)
+
+# En un proceso worker, función que envía sus observaciones al proceso web
+_forward = None
+# Última memoria de Chrome enviada por cada proceso worker {pid: bytes}
+_worker_chrome_rss = {}
+
+def forward_to(send):
+    """Envía las observaciones de este proceso con `send(observación)` en lugar de registrarlas.
+
+    Los scrapings se ejecutan en procesos worker y /metrics lo sirve el proceso
+    web, que las registra con `record`. Con None se vuelven a registrar aquí.
+    """
+    global _forward
+    _forward = send
+
+def _observe(histogram, label, value):
+    if _forward is not None:
+        _forward((histogram, label, value))
+    else:
+        HISTOGRAMS[histogram].labels(label).observe(value)
+
+def report_chrome_rss(rss):
+    """Envía al proceso web la memoria de las sesiones de Chrome de este worker."""
+    if _forward is not None:
+        _forward(('chrome_rss', os.getpid(), rss))
+
+def record(observation):
+    """Registra una observación enviada por un proceso worker."""
+    name, label, value = observation
+    if name == 'chrome_rss':
+        _worker_chrome_rss[label] = value
+    else:
+        HISTOGRAMS[name].labels(label).observe(value)
+
+def forget_workers():
+    """Olvida la memoria de Chrome de los workers, p. ej. al reiniciar su pool."""
+    _worker_chrome_rss.clear()
+
+def timed_query(name):
+    """Decorador que mide la duración de una operación de base de datos."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _observe('db_query', name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+@contextmanager
+def phase(name):
+    """Mide la duración de una fase del scraping (arranque, login, carga, parseo)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _observe('scraper_phase', name, time.perf_counter() - start)
+
+def log_payload(label, payload):
+    """Registra un payload del scraper solo en DEBUG y para una muestra de las llamadas.
+
+    La serialización se hace únicamente si el mensaje se va a escribir.
+    """
+    if not logging.getLogger().isEnabledFor(logging.DEBUG) or random.random() >= PAYLOAD_LOG_SAMPLE:
+        return
+    logging.debug(f"{label}: {json.dumps(payload)}")
+
+def init_app(app, db, cache, chrome_rss):
+    """Instrumenta las rutas de la app y expone /metrics en formato Prometheus."""
+    DB_POOL_SIZE.set(db.size)
+    DB_POOL_IN_USE.set_function(lambda: db.in_use)
+    CACHE_COUNTERS.cache = cache
+    CHROME_RSS.set_function(lambda: chrome_rss() + sum(_worker_chrome_rss.values()))
+
+    @app.before_request
+    def start_timer():
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def record_latency(response):
+        start = g.pop('request_start', None)
+        if start is not None:
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            REQUEST_LATENCY.labels(route, request.method, response.status_code).observe(time.perf_counter() - start)
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(generate_latest(), mimetype=CONTENT_TYPE_LATEST)
@@ -0,0 +1,74 @@
+from bs4 import BeautifulSoup
+import hashlib
+import os
+
+# Paneles de la página de standings: clasificación general y por jornada
+GENERAL_PANEL = 'div.panel.panel-total'
+JORNADA_PANEL = 'div.panel.panel-gameweek'
+
+# Servicio de avatares por defecto (se puede apuntar a un servidor local en las pruebas)
+PLACEHOLDER_AVATAR_URL = os.getenv('MISTER_PLACEHOLDER_AVATAR_URL', 'https://ui-avatars.com/api/')
+
+def placeholder_avatar(initials, username):
+    """Genera la URL de un avatar por defecto con las iniciales del usuario.
+
+    El color sale del nombre de usuario, así que la URL no cambia entre scrapings.
+    """
+    hex_color = hashlib.sha256(username.encode()).hexdigest()[:6]
+    return f'{PLACEHOLDER_AVATAR_URL}?background={hex_color}&color=fff&name={initials}'
+
+def _soup(html):
+    return BeautifulSoup(html, 'lxml')
+
+def _text(element):
+    """Texto visible de un elemento con los espacios normalizados."""
+    if element is None:
+        return ''
+    return ' '.join(element.get_text(' ').split())
+
+def _user_items(soup, panel):
+    """Elementos de la lista de usuarios, limitados al panel indicado si existe."""
+    scope = soup.select_one(panel) or soup
+    return scope.select('ul.user-list li')
+
+def parse_user_list(html, panel=GENERAL_PANEL):
+    """Extrae la lista de usuarios con sus imágenes de perfil de una página de standings."""
+    users = []
+
+    for item in _user_items(_soup(html), panel):
+        name = _text(item.select_one('div.name'))
+        if not name:
+            continue
+
+        img_element = item.select_one('div.pic img')
+        if img_element is not None and img_element.get('src'):
+            img_url = img_element['src']
+        else:
+            img_url = placeholder_avatar(_text(item.select_one('div.pic span')), name)
+
+        users.append({
+            'name': name,
+            'username': name,
+            'profile_image': img_url,
+        })
+
+    return users
+
+def parse_jornada_codes(html):
+    """Extrae los códigos de las jornadas del desplegable de la página de standings."""
+    options = _soup(html).select(f'{JORNADA_PANEL} select option')
+    return [option.get('value') for option in options]
+
+def parse_jornada_points(html, panel=JORNADA_PANEL):
+    """Extrae los puntos de los usuarios de la jornada mostrada en la página."""
+    user_points = []
+
+    for item in _user_items(_soup(html), panel):
+        name = _text(item.select_one('div.info .name'))
+        if name:
+            position = _text(item.select_one('div.position'))
+            points = _text(item.select_one('div.points'))
+
+            user_points.append({"position": position, "username": name, "points": points})
+
+    return user_points
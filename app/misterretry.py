@@ -0,0 +1,68 @@
+import logging
+import os
+import random
+import threading
+import time
+
+# Reintentos por operación y espera inicial (s), que se duplica en cada intento
+RETRIES = int(os.getenv("MISTER_ROUND_RETRIES", 2))
+BASE_DELAY = float(os.getenv("MISTER_RETRY_BASE_DELAY", 1))
+MAX_DELAY = float(os.getenv("MISTER_RETRY_MAX_DELAY", 30))
+
+def backoff_delay(attempt, base_delay=BASE_DELAY, max_delay=MAX_DELAY):
+    """Espera antes del reintento `attempt` (0, 1, ...): exponencial con algo de azar."""
+    delay = min(max_delay, base_delay * 2 ** attempt)
+    return delay * random.uniform(0.5, 1)
+
+def with_retries(fn, *args, description='', retries=RETRIES, **kwargs):
+    """Ejecuta `fn` reintentando con espera exponencial si lanza una excepción."""
+    for attempt in range(retries + 1):
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            if attempt == retries:
+                raise
+            delay = backoff_delay(attempt)
+            logging.warning(f"Error en {description or fn.__name__} (intento {attempt + 1}), reintentando en {delay:.1f} s: {e}")
+            time.sleep(delay)
+
+class CircuitOpenError(Exception):
+    pass
+
+class CircuitBreaker:
+    """Corta las llamadas tras varios fallos seguidos durante un tiempo de enfriamiento.
+
+    Tras `failures` errores consecutivos el circuito se abre y las llamadas fallan
+    al instante durante `cooldown` segundos; después se deja pasar un intento y,
+    si sale bien, el circuito vuelve a cerrarse.
+    """
+
+    def __init__(self, name, failures=3, cooldown=300):
+        self.name = name
+        self.max_failures = failures
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def call(self, fn, *args, **kwargs):
+        with self._lock:
+            if self.opened_at is not None:
+                remaining = self.cooldown - (time.monotonic() - self.opened_at)
+                if remaining > 0:
+                    raise CircuitOpenError(f"{self.name}: circuito abierto, reintento en {remaining:.0f} s")
+
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            with self._lock:
+                self.failures += 1
+                if self.failures >= self.max_failures:
+                    self.opened_at = time.monotonic()
+                    logging.error(f"{self.name}: {self.failures} fallos seguidos, circuito abierto {self.cooldown} s")
+            raise
+
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+        return result
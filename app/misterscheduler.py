@@ -0,0 +1,114 @@
+import fcntl
+import logging
+import os
+import threading
+import time
+
+# Actualización automática de las jornadas (desactivada por defecto)
+SCHEDULER_ENABLED = os.getenv('MISTER_SCHEDULER', '0') == '1'
+# Intervalo mientras cambian los puntos y máximo al que se alarga si no cambian (s)
+REFRESH_MIN_INTERVAL = int(os.getenv('MISTER_REFRESH_MIN_INTERVAL', 300))
+REFRESH_MAX_INTERVAL = int(os.getenv('MISTER_REFRESH_MAX_INTERVAL', 6 * 3600))
+REFRESH_BACKOFF = float(os.getenv('MISTER_REFRESH_BACKOFF', 2))
+# Las peticiones manuales dentro de este margen tras una actualización reutilizan su resultado (s)
+REFRESH_COALESCE = int(os.getenv('MISTER_REFRESH_COALESCE', 60))
+# Fichero de bloqueo para que solo un worker ejecute el planificador
+SCHEDULER_LOCK_FILE = os.getenv('MISTER_SCHEDULER_LOCK', '/tmp/mister-scheduler.lock')
+
+class RefreshScheduler:
+    """Lanza la actualización de las jornadas con un intervalo adaptativo.
+
+    Cada trabajo deja en su progreso un `digest` de los puntos leídos. Si coincide
+    con el de la ejecución anterior, el intervalo se multiplica por REFRESH_BACKOFF
+    hasta REFRESH_MAX_INTERVAL; en cuanto cambia vuelve a REFRESH_MIN_INTERVAL.
+
+    Las peticiones manuales se unen al trabajo en curso, reutilizan el último si
+    acaba de terminar o adelantan la siguiente ejecución programada.
+    """
+
+    def __init__(self, jobs, kind, target, min_interval=REFRESH_MIN_INTERVAL,
+                 max_interval=REFRESH_MAX_INTERVAL, backoff=REFRESH_BACKOFF, coalesce=REFRESH_COALESCE,
+                 first_run=None):
+        self.jobs = jobs
+        self.kind = kind
+        self.target = target
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.coalesce = coalesce
+        self.interval = min_interval
+        # `first_run` (s) permite escalonar el arranque de varios planificadores
+        self.next_run = time.monotonic() + (min_interval if first_run is None else first_run)
+        self.last_digest = None
+        self.last_job = None
+        self.last_finished = None
+        self.running = False
+        self._pending = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._lock_file = None
+
+    def start(self, lock_path=None):
+        """Arranca el planificador si este proceso consigue el bloqueo; devuelve si lo ha hecho."""
+        lock_file = open(lock_path or f"{SCHEDULER_LOCK_FILE}.{self.kind.replace(':', '-')}", 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            logging.info(f"El planificador de {self.kind} ya se ejecuta en otro proceso.")
+            return False
+
+        self._lock_file = lock_file
+        self.running = True
+        threading.Thread(target=self._loop, name=f"scheduler-{self.kind}", daemon=True).start()
+        logging.info(f"Planificador de {self.kind} activo (cada {self.min_interval}-{self.max_interval} s).")
+        return True
+
+    def trigger(self, **kwargs):
+        """Petición manual de actualización; devuelve el trabajo que la atiende."""
+        if not self.running:
+            return self.jobs.submit(self.kind, self.target, **kwargs)
+
+        with self._lock:
+            if self._pending is not None and self._pending.active:
+                return self._pending
+            recent = self.last_finished is not None and time.monotonic() - self.last_finished < self.coalesce
+            if recent and not kwargs and self.last_job.status == 'done':
+                return self.last_job
+            job = self.jobs.submit(self.kind, self.target, **kwargs)
+            self._pending = job
+        self._wake.set()
+        return job
+
+    def _loop(self):
+        while True:
+            self._wake.wait(max(0, self.next_run - time.monotonic()))
+            self._wake.clear()
+            with self._lock:
+                job = self._pending
+                if job is None:
+                    job = self._pending = self.jobs.submit(self.kind, self.target)
+
+            while job.active:
+                job.wait_for_change(job.revision, timeout=60)
+            self._finished(job)
+
+    def _finished(self, job):
+        digest = job.progress.get('digest')
+        if job.status != 'done':
+            self.interval = min(self.max_interval, self.interval * self.backoff)
+            logging.warning(f"{self.kind}: actualización programada fallida, siguiente intento en {self.interval:.0f} s.")
+        elif digest is not None and digest == self.last_digest:
+            self.interval = min(self.max_interval, self.interval * self.backoff)
+            logging.info(f"{self.kind}: jornada sin cambios, siguiente actualización en {self.interval:.0f} s.")
+        else:
+            self.interval = self.min_interval
+            logging.info(f"{self.kind}: jornada actualizada, siguiente actualización en {self.interval:.0f} s.")
+
+        with self._lock:
+            if job.status == 'done':
+                self.last_digest = digest
+            self.last_job = job
+            self.last_finished = time.monotonic()
+            self.next_run = self.last_finished + self.interval
+            self._pending = None
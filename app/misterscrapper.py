@@ -1,16 +1,20 @@
 import logging
 import os
 from datetime import datetime
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
 from dotenv import load_dotenv
-import json
+from misterparser import JORNADA_PANEL, placeholder_avatar
+from misterhttp import HttpBackend
+from misterdriver import get_pool
+from misterretry import CircuitBreaker, with_retries
+from mistercheckpoint import Checkpoint, checkpoint_path
+from mistermetrics import phase, log_payload
+from mistertrace import trace_step, trace_error
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import threading
 import time
-import random
 
 # Configuración de logging
 log_folder = "logs"
@@ -18,23 +22,11 @@ os.makedirs(log_folder, exist_ok=True)
 date_str = datetime.now().strftime("%d-%m-%Y")
 log_file = os.path.join(log_folder, f'app_{date_str}.log')
 logging.basicConfig(
-    level=logging.INFO,
+    level=os.getenv('LOG_LEVEL', 'INFO').upper(),
     format='%(asctime)s - %(levelname)s - %(message)s',
     handlers=[logging.FileHandler(log_file), logging.StreamHandler()]
 )
 
-screenshot_counter = 1
-
-def capture_screenshot(driver, step_name):
-    """Captura una imagen de la pantalla y la guarda con un nombre basado en el paso actual."""
-    global screenshot_counter
-    folder = "screenshots"
-    os.makedirs(folder, exist_ok=True)
-    file_name = os.path.join(folder, f"{screenshot_counter:03d}_{step_name}.png")
-    driver.save_screenshot(file_name)
-    logging.info(f"Captura de pantalla guardada como {file_name}")
-    screenshot_counter += 1
-
 def wait_for_element(driver, by, value, timeout=20, clickable=False):
     """Espera a que un elemento sea visible o clickeable en la página."""
     if clickable:
@@ -45,29 +37,64 @@ def wait_for_element(driver, by, value, timeout=20, clickable=False):
         EC.presence_of_element_located((by, value))
     )
 
+# Botones de clasificación general y por jornada de la página de standings
+GENERAL_BUTTON = '//*[@id="inner-content"]/div[1]/div[1]/div/button[1]'
+JORNADA_BUTTON = '//*[@id="inner-content"]/div[1]/div[1]/div/button[2]'
+
+# Cuenta los usuarios visibles de la lista dentro (o fuera) del panel de jornada
+_VISIBLE_USERS_JS = """
+const items = Array.from(document.querySelectorAll('ul.user-list li'))
+    .filter(li => li.offsetParent !== null && li.innerText.trim());
+return items.filter(li => (li.closest(arguments[0]) !== null) === arguments[1]).length;
+"""
+
+# Código de la jornada seleccionada en el desplegable del panel de jornada
+_SELECTED_GAMEWEEK_JS = """
+const select = document.querySelector(arguments[0] + ' select');
+return select ? select.value : null;
+"""
+
+def wait_for_standings(driver, jornada, timeout=20, code=None):
+    """Espera a que la lista de standings visible sea la de jornada o la general.
+
+    Con `code` también espera a que el desplegable del panel de jornada tenga
+    seleccionada esa jornada, para no leer la lista de otra.
+    """
+    def loaded(d):
+        if d.execute_script(_VISIBLE_USERS_JS, JORNADA_PANEL, jornada) == 0:
+            return False
+        return code is None or d.execute_script(_SELECTED_GAMEWEEK_JS, JORNADA_PANEL) == str(code)
+    return WebDriverWait(driver, timeout).until(loaded)
+
+def log_wait(step, start, fixed_wait):
+    """Registra el tiempo de espera de un paso frente a la espera fija que sustituye."""
+    elapsed = time.perf_counter() - start
+    logging.info(f"{step}: {elapsed:.2f} s de espera (antes {fixed_wait:.0f} s fijos, ahorro {fixed_wait - elapsed:.2f} s)")
+
 def login_to_mister(driver, email, password):
     """Inicia sesión en la plataforma Mister usando las credenciales proporcionadas."""
     login_url = f"https://mister.mundodeportivo.com/new-onboarding/auth/email/sign-in?email={email}"
     driver.get(login_url)
-    capture_screenshot(driver, "login_page_loaded")
+    trace_step(driver, "login_page_loaded")
 
     try:
         password_field = wait_for_element(driver, By.XPATH, "//input[@type='password']")
         password_field.send_keys(password)
-        capture_screenshot(driver, "password_field_filled")
+        trace_step(driver, "password_field_filled")
 
         login_button = wait_for_element(driver, By.XPATH, "//button[@type='submit']", clickable=True)
         login_button.click()
-        capture_screenshot(driver, "login_button_clicked")
+        trace_step(driver, "login_button_clicked")
 
         WebDriverWait(driver, 20).until(
             EC.url_contains("https://mister.mundodeportivo.com/feed")
         )
-        capture_screenshot(driver, "home_page_after_login")
+        trace_step(driver, "home_page_after_login")
         logging.info("Inicio de sesión exitoso.")
     except Exception as e:
-        capture_screenshot(driver, "login_error")
+        trace_error(driver, "login_error")
         logging.error(f"Error durante el inicio de sesión: {e}")
+        raise
 
 def select_general_standings(driver):
     """Accede a la página de standings y selecciona la clasificación general."""
@@ -75,13 +102,15 @@ def select_general_standings(driver):
     WebDriverWait(driver, 20).until(
         EC.url_contains("https://mister.mundodeportivo.com/standings")
     )
-    capture_screenshot(driver, "standings_page_loaded")
+    trace_step(driver, "standings_page_loaded")
     logging.info(f"Página de standings cargada: {driver.current_url}")
 
-    general_btn = driver.find_element(By.XPATH, '//*[@id="inner-content"]/div[1]/div[1]/div/button[1]')
+    start = time.perf_counter()
+    general_btn = wait_for_element(driver, By.XPATH, GENERAL_BUTTON, clickable=True)
     general_btn.click()
-    time.sleep(1)
-    capture_screenshot(driver, "general_standings_loaded")
+    wait_for_standings(driver, jornada=False)
+    log_wait("Clasificación general", start, 1)
+    trace_step(driver, "general_standings_loaded")
     logging.info("Clasificación general seleccionada.")
 
 def select_jornada_standings(driver):
@@ -90,28 +119,19 @@ def select_jornada_standings(driver):
     WebDriverWait(driver, 20).until(
         EC.url_contains("https://mister.mundodeportivo.com/standings")
     )
-    capture_screenshot(driver, "standings_page_loaded")
+    trace_step(driver, "standings_page_loaded")
     logging.info(f"Página de standings cargada: {driver.current_url}")
 
-    jornada_btn = driver.find_element(By.XPATH, '//*[@id="inner-content"]/div[1]/div[1]/div/button[2]')
+    start = time.perf_counter()
+    jornada_btn = wait_for_element(driver, By.XPATH, JORNADA_BUTTON, clickable=True)
     jornada_btn.click()
-    time.sleep(1)
-    capture_screenshot(driver, "jornada_standings_loaded")
+    wait_for_standings(driver, jornada=True)
+    log_wait("Clasificación jornada", start, 1)
+    trace_step(driver, "jornada_standings_loaded")
     logging.info("Clasificación de jornadas seleccionada.")
 
 def get_user_list(driver):
     """Genera una lista de usuarios con sus imágenes de perfil."""
-    name_mapping = {
-        'Endika Arocena Cartagena': 'Endika',
-        '20130': 'Yago',
-        'Ander': 'Ander',
-        'Patricia': 'Patricia',
-        'Galdun': 'Aitor',
-        'YOWNETA': 'Lander',
-        'Al3eXx': 'Alex',
-        'Odei J': 'Odei',
-        'Jandro': 'Alejandro',
-    }
     user_elements = driver.find_elements(By.CSS_SELECTOR, 'ul.user-list li')
 
     users = []
@@ -121,7 +141,7 @@ def get_user_list(driver):
         
         name = user_element.find_element(By.CSS_SELECTOR, 'div.name').text.strip()
         if name:
-            user_info['name'] = name_mapping.get(name, name)
+            user_info['name'] = name
             user_info['username'] = name
             
             try:
@@ -130,15 +150,13 @@ def get_user_list(driver):
             except:
                 img_url = None
                 span_element = user_element.find_element(By.CSS_SELECTOR, 'div.pic span')
-                color = random.randrange(0, 2**24)
-                hex_color = hex(color)[2:].zfill(6)
-                img_url = f'https://ui-avatars.com/api/?background={hex_color}&color=fff&name={span_element.text.strip()}'
+                img_url = placeholder_avatar(span_element.text.strip(), name)
             
             user_info['profile_image'] = img_url
             
             users.append(user_info)
         
-    logging.info(json.dumps(users, indent=4))
+    log_payload("Usuarios", users)
     return users
 
 def get_jornada_codes(driver):
@@ -151,7 +169,7 @@ def get_jornada_codes(driver):
         jornada_code = option.get_attribute("value")
         jornada_codes.append(jornada_code)
     
-    logging.info(json.dumps(jornada_codes, indent=4))
+    log_payload("Códigos de jornada", jornada_codes)
     return jornada_codes
 
 def get_jornada_points(driver):
@@ -170,86 +188,280 @@ def get_jornada_points(driver):
     
     return user_points
 
+# ==== EXTRACCIÓN EN UNA SOLA LLAMADA ====
+# 'script' lee cada lista con un único execute_script; 'elements' usa find_element
+# por cada campo de cada usuario (una llamada a chromedriver por campo)
+EXTRACTION_MODE = os.getenv("MISTER_EXTRACTION", "script")
+
+# Solo los elementos visibles, igual que el .text de Selenium
+_USER_ROWS_JS = """
+const text = (el) => el ? el.innerText.trim() : '';
+return Array.from(document.querySelectorAll('ul.user-list li'))
+    .filter(li => li.offsetParent !== null)
+    .map(li => {
+        const img = li.querySelector('div.pic img');
+        return {
+            name: text(li.querySelector(arguments[0])),
+            position: text(li.querySelector('div.position')),
+            points: text(li.querySelector('div.points')),
+            img: img ? img.src : null,
+            initials: text(li.querySelector('div.pic span')),
+        };
+    })
+    .filter(row => row.name);
+"""
+
+_JORNADA_CODES_JS = """
+return Array.from(document.querySelectorAll('div.panel.panel-gameweek select option')).map(o => o.value);
+"""
+
+def extract_user_list(driver):
+    """Igual que get_user_list, pero leyendo toda la lista en una sola llamada."""
+    return [{
+        'name': row['name'],
+        'username': row['name'],
+        'profile_image': row['img'] or placeholder_avatar(row['initials'], row['name']),
+    } for row in driver.execute_script(_USER_ROWS_JS, 'div.name')]
+
+def extract_jornada_codes(driver):
+    """Igual que get_jornada_codes, pero en una sola llamada."""
+    return driver.execute_script(_JORNADA_CODES_JS)
+
+def extract_jornada_points(driver):
+    """Igual que get_jornada_points, pero leyendo toda la lista en una sola llamada."""
+    return [
+        {"position": row['position'], "username": row['name'], "points": row['points']}
+        for row in driver.execute_script(_USER_ROWS_JS, 'div.info .name')
+    ]
+
 def load_jornada(driver, code):
     """Carga una jornada específica y toma una captura de pantalla."""
     driver.get(f"https://mister.mundodeportivo.com/standings?gw={code}")
-    time.sleep(1)
-    jornada_btn = driver.find_element(By.XPATH, '//*[@id="inner-content"]/div[1]/div[1]/div/button[2]')
+    start = time.perf_counter()
+    jornada_btn = wait_for_element(driver, By.XPATH, JORNADA_BUTTON, clickable=True)
     jornada_btn.click()
-    time.sleep(1)
+    wait_for_standings(driver, jornada=True, code=code)
+    log_wait(f"Jornada {code}", start, 2)
     logging.info(f"Clasificación de jornada cargada para el código: {code}")
     logging.info(f'URL de la jornada: {driver.current_url}')
-    capture_screenshot(driver, f"jornada_{code}_loaded")
+    trace_step(driver, f"jornada_{code}_loaded")
 
-# ==== FUNCIONES PRINCIPALES ====
-def get_player_list():
-    """Recoge la lista de jugadores y sus imágenes de perfil."""
-    success = False
+# ==== BACKENDS ====
+# Backend por defecto: 'selenium' o 'http'. El backend HTTP vuelve a Selenium si falla.
+MISTER_BACKEND = os.getenv("MISTER_BACKEND", "selenium")
+
+class SeleniumBackend:
+    """Backend de scraping que controla un Chrome headless."""
+    name = 'selenium'
+
+    def __init__(self, email, password):
+        self.email = email
+        self.password = password
+        self.pool = get_pool(email, lambda driver: login_to_mister(driver, email, password))
+        self.pooled = None
+        self.driver = None
+
+    def __enter__(self):
+        # La sesión ya la abre open_backend(); el bloque with solo garantiza el cierre
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def open(self):
+        """Toma prestada una sesión ya autenticada del pool de Chrome."""
+        self.pooled = self.pool.checkout()
+        self.driver = self.pooled.driver
+
+    def close(self):
+        if self.pooled is not None:
+            self.pool.checkin(self.pooled)
+            self.pooled = None
+            self.driver = None
+
+    def capture(self, step_name):
+        trace_error(self.driver, step_name)
+
+    def get_user_list(self):
+        with phase('standings'):
+            select_general_standings(self.driver)
+        with phase('parse'):
+            if EXTRACTION_MODE == 'script':
+                return extract_user_list(self.driver)
+            return get_user_list(self.driver)
+
+    def get_jornada_codes(self):
+        with phase('standings'):
+            select_jornada_standings(self.driver)
+        with phase('parse'):
+            if EXTRACTION_MODE == 'script':
+                return extract_jornada_codes(self.driver)
+            return get_jornada_codes(self.driver)
+
+    def get_jornada_points(self, code):
+        with phase('load_round'):
+            load_jornada(self.driver, code)
+        with phase('parse'):
+            if EXTRACTION_MODE == 'script':
+                return extract_jornada_points(self.driver)
+            return get_jornada_points(self.driver)
+
+# Tras varios inicios de sesión fallidos seguidos de una cuenta se deja de intentar durante un tiempo
+LOGIN_MAX_FAILURES = int(os.getenv("MISTER_LOGIN_MAX_FAILURES", 3))
+LOGIN_COOLDOWN = int(os.getenv("MISTER_LOGIN_COOLDOWN", 300))
+_login_breakers = {}
+_login_breakers_lock = threading.Lock()
+
+def login_breaker(email):
+    """Circuit breaker del inicio de sesión de una cuenta."""
+    with _login_breakers_lock:
+        if email not in _login_breakers:
+            _login_breakers[email] = CircuitBreaker(f"login {email}", LOGIN_MAX_FAILURES, LOGIN_COOLDOWN)
+        return _login_breakers[email]
+
+def open_backend(email, password, backend=None):
+    """Abre una sesión en el backend configurado, usando Selenium como respaldo."""
+    return login_breaker(email).call(_open_backend, email, password, backend)
+
+def _open_backend(email, password, backend=None):
+    backend = backend or MISTER_BACKEND
+    if backend == HttpBackend.name:
+        http_backend = HttpBackend(email, password)
+        try:
+            http_backend.open()
+            return http_backend
+        except Exception as e:
+            http_backend.close()
+            logging.warning(f"Backend HTTP no disponible, usando Selenium: {e}")
+
+    selenium_backend = SeleniumBackend(email, password)
+    selenium_backend.open()
+    return selenium_backend
+
+# Prefijo de las variables de entorno con las credenciales de la liga por defecto
+DEFAULT_ACCOUNT = 'MISTER'
+
+def get_credentials(account=DEFAULT_ACCOUNT):
+    """Lee las credenciales de Mister de las variables <account>_USERNAME y <account>_PASSWORD."""
     load_dotenv()
-    email = os.getenv("MISTER_USERNAME")
-    password = os.getenv("MISTER_PASSWORD")
+    email = os.getenv(f"{account}_USERNAME")
+    password = os.getenv(f"{account}_PASSWORD")
 
     if not email or not password:
-        logging.error("Las variables de entorno MISTER_USERNAME y/o MISTER_PASSWORD no están definidas.")
-        return success, []
+        logging.error(f"Las variables de entorno {account}_USERNAME y/o {account}_PASSWORD no están definidas.")
+    return email, password
 
-    options = webdriver.ChromeOptions()
-    options.add_argument('--no-sandbox')
-    options.add_argument('--disable-dev-shm-usage')
-    options.add_argument('--headless')
-    
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=options)
+# ==== CARGA DE JORNADAS ====
+# Jornadas que se cargan en paralelo, cada una en su propia sesión
+SCRAPE_WORKERS = int(os.getenv("MISTER_SCRAPE_WORKERS", 1))
+
+def _load_with_retries(load, code):
+    """Carga una jornada reintentando con espera exponencial si falla o excede su tiempo máximo."""
+    return with_retries(load, code, description=f"la jornada {code}")
+
+def _load_in_own_session(email, password, code):
+    """Carga una jornada en una sesión propia del backend, que comparte la autenticación."""
+    with open_backend(email, password) as backend:
+        return backend.get_jornada_points(code)
+
+def iter_jornadas(backend, email, password, pending, workers=SCRAPE_WORKERS):
+    """Genera (num, puntos) de las jornadas pendientes [(num, código)] en orden de jornada.
+
+    Con `workers` > 1 las jornadas se reparten entre varias sesiones en un pool de
+    hilos; una jornada lenta solo retrasa su propio hilo y se reintenta por separado.
+    Las que terminan antes que una anterior esperan en memoria hasta poder emitirse.
+    """
+    if workers <= 1 or len(pending) <= 1:
+        for num, code in pending:
+            yield num, _load_with_retries(backend.get_jornada_points, code)
+        return
 
+    load = lambda code: _load_in_own_session(email, password, code)
+    order = [num for num, _ in pending]
+    ready = {}
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='jornada')
     try:
-        login_to_mister(driver, email, password)
-        select_general_standings(driver)
-        user_list = get_user_list(driver)
-        success = True if user_list else False
-    except Exception as e:
-        capture_screenshot(driver, "player_list_error")
-        logging.error(f"Error al recoger la lista de jugadores: {e}")
+        futures = {executor.submit(_load_with_retries, load, code): num for num, code in pending}
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                ready[futures.pop(future)] = future.result()
+            while order and order[0] in ready:
+                num = order.pop(0)
+                yield num, ready.pop(num)
     finally:
-        driver.quit()
-    
-    return success, user_list
+        executor.shutdown(wait=False, cancel_futures=True)
 
-def get_all_jornada_points():
-    """Recoge los puntos de todas las jornadas disponibles."""
+# ==== FUNCIONES PRINCIPALES ====
+def get_player_list(account=DEFAULT_ACCOUNT):
+    """Recoge la lista de jugadores y sus imágenes de perfil."""
     success = False
-    load_dotenv()
-    email = os.getenv("MISTER_USERNAME")
-    password = os.getenv("MISTER_PASSWORD")
+    user_list = []
+    email, password = get_credentials(account)
 
     if not email or not password:
-        logging.error("Las variables de entorno MISTER_USERNAME y/o MISTER_PASSWORD no están definidas.")
-        return success, []
-
-    options = webdriver.ChromeOptions()
-    options.add_argument('--no-sandbox')
-    options.add_argument('--disable-dev-shm-usage')
-    options.add_argument('--headless')
-    
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=options)
+        return success, user_list
 
     try:
-        login_to_mister(driver, email, password)
-        select_jornada_standings(driver)
-        
-        jornada_codes = get_jornada_codes(driver)
-        jornada_points = []
-        
-        for code in jornada_codes:
-            load_jornada(driver, code)
-            jornada_points.append(get_jornada_points(driver))
-        
-        logging.info(json.dumps(jornada_points, indent=4))
-        success = True if jornada_points else False
+        backend = open_backend(email, password)
     except Exception as e:
-        capture_screenshot(driver, "jornada_points_error")
-        logging.error(f"Error al recoger los puntos de las jornadas: {e}")
-    finally:
-        driver.quit()
+        logging.error(f"Error al iniciar sesión en Mister: {e}")
+        return success, user_list
+
+    with backend:
+        try:
+            user_list = backend.get_user_list()
+            success = True if user_list else False
+        except Exception as e:
+            backend.capture("player_list_error")
+            logging.error(f"Error al recoger la lista de jugadores: {e}")
     
-    return success, jornada_points
\ No newline at end of file
+    return success, user_list
+
+def iter_jornada_points(closed_rounds=None, full=False, on_plan=None, account=DEFAULT_ACCOUNT):
+    """Genera (número de jornada, puntos) de cada jornada pendiente en cuanto se lee.
+
+    Las jornadas incluidas en `closed_rounds` ya están cerradas en la base de datos
+    y no se vuelven a cargar, salvo que se pida una recarga completa con `full=True`.
+    `on_plan` recibe los números de las jornadas que se van a cargar. Los errores
+    se propagan al consumidor, que conserva las jornadas recibidas hasta entonces.
+    `account` es el prefijo de las credenciales de la liga.
+    """
+    closed_rounds = set() if full or not closed_rounds else set(closed_rounds)
+    email, password = get_credentials(account)
+
+    if not email or not password:
+        raise RuntimeError("Faltan las credenciales de Mister.")
+
+    with open_backend(email, password) as backend:
+        try:
+            jornada_codes = backend.get_jornada_codes()
+            if not jornada_codes:
+                raise RuntimeError("No se han encontrado jornadas.")
+
+            pending = [(num, code) for num, code in enumerate(jornada_codes, start=1) if num not in closed_rounds]
+            logging.info(f"Jornadas a cargar: {[num for num, _ in pending]} ({len(jornada_codes) - len(pending)} cerradas omitidas)")
+            if on_plan:
+                on_plan([num for num, _ in pending])
+
+            # Las jornadas cargadas por un scraping fallido reciente no se vuelven a cargar,
+            # salvo la última: sigue abierta y sus puntos pueden haber cambiado
+            checkpoint = Checkpoint.resume(jornada_codes, checkpoint_path(account))
+            last_round = len(jornada_codes)
+            to_fetch = []
+            for num, code in pending:
+                points = checkpoint.fetched(num, code) if num < last_round else None
+                if points is None:
+                    to_fetch.append((num, code))
+                else:
+                    yield num, points
+
+            codes = dict(to_fetch)
+            for num, points in iter_jornadas(backend, email, password, to_fetch):
+                checkpoint.record(num, codes[num], points)
+                yield num, points
+
+            checkpoint.finish()
+        except Exception:
+            backend.capture("jornada_points_error")
+            raise
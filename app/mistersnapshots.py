@@ -0,0 +1,109 @@
+import gzip
+import logging
+import os
+import shutil
+import time
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Carpeta compartida con nginx donde se publican las lecturas de la API; vacía para desactivarlo
+SNAPSHOT_DIR = os.getenv('MISTER_SNAPSHOT_DIR', 'snapshots')
+# Versiones anteriores que se conservan por si nginx aún está leyendo alguna
+SNAPSHOT_KEEP = 2
+# Enlace a la liga que sirve nginx cuando la petición no lleva ?league=
+DEFAULT_LINK = '_default'
+
+def _replace_symlink(target, path):
+    """Apunta `path` a `target` de forma atómica."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.remove(tmp_path)
+    except FileNotFoundError:
+        pass
+    os.symlink(target, tmp_path)
+    os.replace(tmp_path, path)
+
+def write_precompressed(file_path, body):
+    """Escribe `body` junto a sus versiones .gz y .br para gzip_static/brotli_static de nginx."""
+    with open(file_path, 'wb') as f:
+        f.write(body)
+    with open(f"{file_path}.gz", 'wb') as f:
+        f.write(gzip.compress(body, compresslevel=9, mtime=0))
+    if brotli is not None:
+        with open(f"{file_path}.br", 'wb') as f:
+            f.write(brotli.compress(body))
+
+class SnapshotPublisher:
+    """Publica en disco las respuestas JSON de la API para que nginx las sirva sin pasar por Flask.
+
+    Cada liga tiene sus versiones en `<root>/<slug>/v<n>/` y un enlace `current`
+    a la última, que se cambia de forma atómica. Los ficheros se guardan también
+    comprimidos (.gz y, si está instalado brotli, .br). Sin enlace `current`
+    nginx deriva las lecturas de la liga a Flask.
+    """
+
+    def __init__(self, root=SNAPSHOT_DIR):
+        self.root = root
+
+    @property
+    def enabled(self):
+        return bool(self.root)
+
+    def publish(self, league, files):
+        """Publica una nueva versión con los ficheros {ruta relativa: contenido}."""
+        if not self.enabled:
+            return
+        league_dir = os.path.join(self.root, league)
+        version = f"v{time.time_ns()}"
+        tmp_dir = os.path.join(league_dir, f".{version}.tmp")
+        os.makedirs(tmp_dir)
+
+        for path, body in files.items():
+            file_path = os.path.join(tmp_dir, path)
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            write_precompressed(file_path, body)
+
+        os.rename(tmp_dir, os.path.join(league_dir, version))
+        _replace_symlink(version, os.path.join(league_dir, 'current'))
+        self._prune(league_dir)
+        logging.info(f"Snapshots de {league} publicados ({len(files)} ficheros, {version}).")
+
+    def published(self, league):
+        return self.enabled and os.path.exists(os.path.join(self.root, league, 'current'))
+
+    def unpublish(self, league):
+        """Retira la versión publicada de una liga hasta la siguiente publicación."""
+        if not self.enabled:
+            return
+        try:
+            os.remove(os.path.join(self.root, league, 'current'))
+            logging.info(f"Snapshots de {league} retirados.")
+        except FileNotFoundError:
+            pass
+
+    def clear(self):
+        """Retira los snapshots de todas las ligas."""
+        if self.enabled and os.path.isdir(self.root):
+            for entry in os.scandir(self.root):
+                if entry.is_dir(follow_symlinks=False):
+                    self.unpublish(entry.name)
+
+    def set_default(self, league):
+        if self.enabled:
+            os.makedirs(self.root, exist_ok=True)
+            _replace_symlink(league, os.path.join(self.root, DEFAULT_LINK))
+
+    def _prune(self, league_dir):
+        # Las carpetas .v<n>.tmp son publicaciones en curso de otros procesos
+        versions = sorted(
+            (entry.name for entry in os.scandir(league_dir)
+             if entry.is_dir(follow_symlinks=False) and entry.name.startswith('v')),
+            key=lambda name: int(name[1:]),
+        )
+        current = os.readlink(os.path.join(league_dir, 'current'))
+        for name in versions[:-SNAPSHOT_KEEP]:
+            if name != current:
+                shutil.rmtree(os.path.join(league_dir, name), ignore_errors=True)
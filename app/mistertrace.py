@@ -0,0 +1,169 @@
+import atexit
+import io
+import itertools
+import logging
+import os
+import queue
+import threading
+import time
+import weakref
+from collections import deque
+from datetime import datetime
+from PIL import Image
+
+# Nivel de trazas: 'off', 'errors' (solo la captura del error) o 'steps'
+# (además guarda en memoria los últimos pasos y los escribe si hay un error)
+TRACE_LEVEL = os.getenv('MISTER_TRACE', 'errors').lower()
+TRACE_DIR = os.getenv('MISTER_TRACE_DIR', os.path.join('logs', 'screenshots'))
+# Pasos previos al error que se conservan en el nivel 'steps'
+TRACE_STEPS = int(os.getenv('MISTER_TRACE_STEPS', 10))
+# Formato ('webp' o 'jpeg'), calidad y ancho máximo (0 para no reducir) de las capturas
+TRACE_FORMAT = os.getenv('MISTER_TRACE_FORMAT', 'webp').lower()
+TRACE_QUALITY = int(os.getenv('MISTER_TRACE_QUALITY', 60))
+TRACE_MAX_WIDTH = int(os.getenv('MISTER_TRACE_MAX_WIDTH', 1024))
+# Retención: número de ficheros, antigüedad (s) y tamaño total (MB) de la carpeta
+TRACE_MAX_FILES = int(os.getenv('MISTER_TRACE_MAX_FILES', 200))
+TRACE_MAX_AGE = int(os.getenv('MISTER_TRACE_MAX_AGE', 7 * 24 * 3600))
+TRACE_MAX_MB = int(os.getenv('MISTER_TRACE_MAX_MB', 100))
+# Capturas pendientes de escribir; si la cola se llena se descartan
+TRACE_QUEUE_SIZE = 50
+
+LEVELS = ('off', 'errors', 'steps')
+EXTENSIONS = {'webp': 'webp', 'jpeg': 'jpg'}
+
+def encode(png, fmt=TRACE_FORMAT, quality=TRACE_QUALITY, max_width=TRACE_MAX_WIDTH):
+    """Convierte una captura PNG a WebP/JPEG, reduciéndola si supera `max_width`."""
+    image = Image.open(io.BytesIO(png)).convert('RGB')
+    if max_width and image.width > max_width:
+        image.thumbnail((max_width, image.height * max_width // image.width))
+    out = io.BytesIO()
+    image.save(out, format=fmt.upper(), quality=quality)
+    return out.getvalue()
+
+def prune(folder, max_files=TRACE_MAX_FILES, max_age=TRACE_MAX_AGE, max_bytes=TRACE_MAX_MB * 1024 * 1024):
+    """Borra las capturas más antiguas hasta cumplir los límites de retención."""
+    files = []
+    for entry in os.scandir(folder):
+        if entry.is_file() and not entry.name.startswith('.'):
+            stat = entry.stat()
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+    files.sort()
+
+    now = time.time()
+    total = sum(size for _, size, _ in files)
+    removed = 0
+    for mtime, size, path in files:
+        if now - mtime <= max_age and len(files) - removed <= max_files and total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+    if removed:
+        logging.info(f"Eliminadas {removed} capturas antiguas de {folder}")
+
+class Tracer:
+    """Capturas de pantalla del scraper, escritas en segundo plano.
+
+    Las capturas se toman en el hilo del scraper (solo el PNG del driver) y un
+    hilo aparte se encarga de comprimirlas, guardarlas y aplicar la retención.
+    Los últimos pasos se guardan por driver, así que el error de una sesión no
+    incluye ni borra los pasos de las que se ejecutan en paralelo.
+    """
+
+    def __init__(self, level=TRACE_LEVEL, folder=TRACE_DIR, steps=TRACE_STEPS, fmt=TRACE_FORMAT):
+        if level not in LEVELS:
+            logging.warning(f"Nivel de trazas desconocido '{level}', usando 'errors'.")
+            level = 'errors'
+        self.level = level
+        self.folder = folder
+        self.fmt = fmt if fmt in EXTENSIONS else 'webp'
+        self.steps = steps
+        # Últimos pasos de cada driver; se liberan cuando el driver deja de existir
+        self._steps = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._counter = itertools.count(1)
+        self._queue = queue.Queue(TRACE_QUEUE_SIZE)
+        self._writer = None
+
+    def step(self, driver, name):
+        """Registra un paso; solo se escribe a disco si después hay un error."""
+        if self.level != 'steps':
+            return
+        png = self._grab(driver, name)
+        if png is not None:
+            with self._lock:
+                if driver not in self._steps:
+                    self._steps[driver] = deque(maxlen=self.steps)
+                self._steps[driver].append((datetime.now(), name, png))
+
+    def error(self, driver, name):
+        """Guarda la captura del error junto con los últimos pasos previos."""
+        if self.level == 'off':
+            return
+        with self._lock:
+            shots = list(self._steps.pop(driver, [])) if driver is not None else []
+        png = self._grab(driver, name)
+        if png is not None:
+            shots.append((datetime.now(), name, png))
+        for shot in shots:
+            self._submit(shot)
+
+    def close(self, timeout=10):
+        """Espera a que se escriban las capturas pendientes."""
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join(timeout)
+            self._writer = None
+
+    def _grab(self, driver, name):
+        if driver is None:
+            return None
+        try:
+            return driver.get_screenshot_as_png()
+        except Exception as e:
+            logging.warning(f"No se ha podido capturar la pantalla '{name}': {e}")
+            return None
+
+    def _submit(self, shot):
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name='mister-trace', daemon=True)
+                self._writer.start()
+        try:
+            self._queue.put_nowait(shot)
+        except queue.Full:
+            logging.warning(f"Cola de capturas llena, descartando '{shot[1]}'.")
+
+    def _write_loop(self):
+        while True:
+            shot = self._queue.get()
+            if shot is None:
+                return
+            try:
+                self._write(*shot)
+                if self._queue.empty():
+                    prune(self.folder)
+            except Exception:
+                logging.exception(f"Error al guardar la captura '{shot[1]}'")
+
+    def _write(self, taken_at, name, png):
+        os.makedirs(self.folder, exist_ok=True)
+        file_name = os.path.join(
+            self.folder,
+            f"{taken_at:%Y%m%d-%H%M%S}_{next(self._counter):04d}_{name}.{EXTENSIONS[self.fmt]}",
+        )
+        with open(file_name, 'wb') as f:
+            f.write(encode(png, self.fmt))
+        logging.info(f"Captura de pantalla guardada como {file_name}")
+
+TRACER = Tracer()
+atexit.register(TRACER.close)
+
+def trace_step(driver, name):
+    TRACER.step(driver, name)
+
+def trace_error(driver, name):
+    TRACER.error(driver, name)
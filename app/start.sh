@@ -0,0 +1,29 @@
+#!/bin/sh
+# Arranca la app con el servidor indicado en MISTER_SERVER:
+#   dev       servidor de desarrollo de Flask (por defecto)
+#   gunicorn  gunicorn con GUNICORN_WORKERS procesos de GUNICORN_THREADS hilos
+# Los trabajos de actualización viven en el proceso que los lanza: con más de un
+# worker, /api/jobs/<id> puede llegar a otro proceso y devolver 404.
+set -e
+
+# Estáticos con huella y comprimidos en static/dist; sin ellos se sirven los originales
+python -m misterassets || echo "No se han podido compilar los estáticos" >&2
+
+case "${MISTER_SERVER:-dev}" in
+    gunicorn)
+        exec gunicorn app:app \
+            --bind 0.0.0.0:5000 \
+            --worker-class gthread \
+            --workers "${GUNICORN_WORKERS:-1}" \
+            --threads "${GUNICORN_THREADS:-8}" \
+            --timeout 120 \
+            --access-logfile -
+        ;;
+    dev)
+        exec flask run --host=0.0.0.0
+        ;;
+    *)
+        echo "MISTER_SERVER desconocido: ${MISTER_SERVER}" >&2
+        exit 1
+        ;;
+esac
@@ -1,3 +1,15 @@
+// Liga de la página (/mister?league=<slug>); sin ella la API usa la liga por defecto
+const LIGA = new URLSearchParams(window.location.search).get('league');
+
+function apiUrl(path, params = {}) {
+    const query = new URLSearchParams(params);
+    if (LIGA) {
+        query.set('league', LIGA);
+    }
+    const queryString = query.toString();
+    return queryString ? `${path}?${queryString}` : path;
+}
+
 // FUNCIONES PARA GENERAR TABLAS
 function profileFormatter(cell) {
     var data = cell.getRow().getData();
@@ -112,36 +124,37 @@ function initializeDebtsTable(debtData) {
 document.addEventListener('DOMContentLoaded', () => {
     const selectorJornada = document.getElementById('selector-jornada');
 
-    function cargarJornadas(){
-        fetch(`/api/numjornadas`)
-        .then(response => response.json())
-        .then(jornadas => {
-            selectorJornada.innerHTML = '';
-            for (var jornada in jornadas ){
-                selectorJornada.innerHTML += `
-                <option value="${jornada}">${jornadas[jornada]}</option>`;
-            }
-            selectorJornada.selectedIndex = selectorJornada.options.length - 1
-            cargarLeaderboard(selectorJornada.value);
-
-        })
-        .catch(error => console.error('Error:', error));
+    // Jornadas, clasificación de la última jornada y deudas en una sola respuesta
+    function mostrarDashboard(dashboard) {
+        const jornadas = dashboard.rounds;
+        selectorJornada.innerHTML = '';
+        for (var jornada in jornadas ){
+            selectorJornada.innerHTML += `
+            <option value="${jornada}">${jornadas[jornada]}</option>`;
+        }
+        if (dashboard.jornada !== null) {
+            selectorJornada.value = dashboard.jornada;
+        }
+        initializeLeaderboardTable(dashboard.standings);
+        if (dashboard.debts && dashboard.debts.length) {
+            initializeDebtsTable(dashboard.debts);
+        }
     }
 
-    function cargarLeaderboard(jornada) {
-        fetch(`/api/jornada?jornada=${jornada}`)
+    // live: durante una actualización el snapshot publicado aún no tiene las
+    // jornadas nuevas, así que el panel se pide directamente a la app
+    function cargarDashboard(live = false){
+        fetch(apiUrl('/api/mister/dashboard', live ? { live: 1 } : {}))
             .then(response => response.json())
-            .then(data => {
-                initializeLeaderboardTable(data);
-            })
+            .then(mostrarDashboard)
             .catch(error => console.error('Error:', error));
     }
-    
-    function cargarDebts(){
-        fetch(`/api/deudas`)
+
+    function cargarLeaderboard(jornada) {
+        fetch(apiUrl('/api/jornada', { jornada: jornada }))
             .then(response => response.json())
             .then(data => {
-                initializeDebtsTable(data);
+                initializeLeaderboardTable(data);
             })
             .catch(error => console.error('Error:', error));
     }
@@ -150,8 +163,18 @@ document.addEventListener('DOMContentLoaded', () => {
         cargarLeaderboard(event.target.value);
     });
 
-    cargarJornadas();
-    cargarDebts();
+    // Mostrar las jornadas que se van guardando durante una actualización
+    document.addEventListener('jornada-actualizada', () => {
+        cargarDashboard(true);
+    });
+
+    // El servidor incrusta el panel en la página; si no está, se pide a la API
+    const incrustado = document.getElementById('dashboard-data');
+    if (incrustado) {
+        mostrarDashboard(JSON.parse(incrustado.textContent));
+    } else {
+        cargarDashboard();
+    }
 });
 
 document.getElementById('update').addEventListener('click', function() {
@@ -164,7 +187,7 @@ document.getElementById('update').addEventListener('click', function() {
     spinner.classList.remove('hidden');
 
     // Define the URL and the data to be sent
-    const url = '/api/misterupdate'; // Cambia esto por la URL de tu API
+    const url = apiUrl('/api/misterupdate');
     const data = {
         key1: 'value1',
         key2: 'value2'
@@ -179,9 +202,9 @@ document.getElementById('update').addEventListener('click', function() {
         body: JSON.stringify(data)
     })
     .then(response => response.json()) // Parse the JSON response
-    .then(data => {
-        console.log('Success:', data);
-        // Aquí puedes hacer algo con la respuesta
+    .then(job => esperarTrabajo(job.job_id, text)) // La actualización se ejecuta en segundo plano
+    .then(job => {
+        console.log('Success:', job);
     })
     .catch((error) => {
         console.error('Error:', error);
@@ -195,3 +218,37 @@ document.getElementById('update').addEventListener('click', function() {
         window.location.reload();
     });
 });
+
+// Sigue el progreso de un trabajo por server-sent events hasta que termina
+function esperarTrabajo(jobId, text) {
+    return new Promise((resolve, reject) => {
+        const events = new EventSource(`/api/jobs/${jobId}/events`);
+        let ultimaJornada = null;
+
+        events.onmessage = (event) => {
+            const job = JSON.parse(event.data);
+            const progress = job.progress;
+
+            if (progress.rounds_total) {
+                text.textContent = `${progress.rounds_scraped}/${progress.rounds_total}`;
+                text.classList.remove('hidden');
+            }
+            if (progress.last_round && progress.last_round !== ultimaJornada) {
+                ultimaJornada = progress.last_round;
+                document.dispatchEvent(new CustomEvent('jornada-actualizada'));
+            }
+
+            if (job.status === 'done') {
+                events.close();
+                resolve(job);
+            } else if (job.status === 'failed') {
+                events.close();
+                reject(new Error(job.message));
+            }
+        };
+        events.onerror = () => {
+            events.close();
+            reject(new Error('Conexión de progreso perdida'));
+        };
+    });
+}
@@ -1,9 +1,11 @@
 var userLang = navigator.language || navigator.userLanguage;
 console.log("The language is: " + userLang.slice(0, -3));
 
-// Function to fetch language data
+// Function to fetch language data (la plantilla indica la URL de cada idioma)
 async function fetchLanguageData(lang) {
-    const response = await fetch(`/static/lan/portfolio/${lang}.json`);
+    const url = document.body.dataset[`lang${lang.charAt(0).toUpperCase()}${lang.slice(1)}`]
+        || `/static/lang/portfolio/${lang}.json`;
+    const response = await fetch(url);
     return response.json();
 }
 